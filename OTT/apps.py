@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class OttConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'OTT'
+
+    def ready(self):
+        from django_back.database import apply_sqlite_pragmas
+        from . import media_gc, stats, suggest
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="ott_sqlite_pragmas")
+        post_save.connect(suggest.movie_saved, sender="OTT.Movie", dispatch_uid="ott_suggest_saved")
+        post_delete.connect(suggest.movie_deleted, sender="OTT.Movie", dispatch_uid="ott_suggest_deleted")
+        pre_save.connect(media_gc.movie_pre_save, sender="OTT.Movie", dispatch_uid="ott_media_gc_movie_saved")
+        post_delete.connect(media_gc.movie_post_delete, sender="OTT.Movie", dispatch_uid="ott_media_gc_movie_deleted")
+        pre_save.connect(media_gc.user_pre_save, sender="OTT.User", dispatch_uid="ott_media_gc_user_saved")
+        post_delete.connect(media_gc.user_post_delete, sender="OTT.User", dispatch_uid="ott_media_gc_user_deleted")
+        post_save.connect(stats.movie_saved, sender="OTT.Movie", dispatch_uid="ott_stats_movie_saved")
+        post_save.connect(stats.watchlist_saved, sender="OTT.Watchlist", dispatch_uid="ott_stats_watchlist_saved")
+        post_delete.connect(stats.watchlist_deleted, sender="OTT.Watchlist", dispatch_uid="ott_stats_watchlist_deleted")
+        post_save.connect(stats.view_saved, sender="OTT.ViewHistory", dispatch_uid="ott_stats_view_saved")
@@ -0,0 +1,165 @@
+"""
+Request batching for the React client.
+
+``GET /api/batch/?path=/api/csrf/&path=/api/me/&path=/api/movies/`` resolves
+each path against the URLconf and calls its view directly, inside the
+batch request's already-authenticated context (same session, user and CSRF
+cookie). The middleware stack, the session lookup and the auth check run
+once for the whole batch instead of once per call.
+
+Only GET sub-requests under ``/api/`` are allowed, so a batch is exactly as
+safe as its parts, and each one is rate limited like a direct call (the
+middleware doesn't see them). Sync views run one after another; async views
+are awaited together. Sub-responses that are JSON are embedded as-is (no
+re-parse), anything else as text.
+"""
+import asyncio
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+import orjson
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .ratelimit import throttle
+
+API_PREFIX = "/api/"
+# Per-request state set by middleware that views rely on.
+SHARED_ATTRIBUTES = ("session", "user", "_messages", "csrf_processing_done")
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_paths(paths):
+    """Validate the ``path`` parameters; raises BatchError on a bad batch."""
+    if not paths:
+        raise BatchError("Pass at least one ?path=.")
+    if len(paths) > settings.BATCH_MAX_REQUESTS:
+        raise BatchError(f"At most {settings.BATCH_MAX_REQUESTS} sub-requests per batch.")
+    parsed = []
+    for path in paths:
+        parts = urlsplit(path)
+        if parts.scheme or parts.netloc or not parts.path.startswith(API_PREFIX):
+            raise BatchError(f"Not an API path: {path!r}")
+        parsed.append((path, parts.path, parts.query))
+    return parsed
+
+
+def sub_request(request, path, query):
+    """A GET for ``path`` that shares ``request``'s session, user and headers."""
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH", "wsgi.input")
+    }
+    sub.META.update(REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query, CONTENT_LENGTH="0")
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    for name in SHARED_ATTRIBUTES:
+        if hasattr(request, name):
+            setattr(sub, name, getattr(request, name))
+    return sub
+
+
+def run_batch(request, paths):
+    """
+    ``(results, cookies)``: one result dict per path, in order, and the
+    cookies the sub-responses set, for the batch response to carry.
+    """
+    batch_path = request.path
+    results, subs, pending = [], [], []
+    responses = {}
+
+    for original, path, query in parse_paths(paths):
+        sub = sub_request(request, path, query)
+        subs.append(sub)
+        try:
+            match = resolve(path)
+        except Resolver404:
+            results.append(error_result(original, 404, "Not found."))
+            continue
+        if path == batch_path:
+            results.append(error_result(original, 400, "Batches can't be nested."))
+            continue
+        sub.resolver_match = match
+        throttled = throttle(sub, match.url_name)
+        if throttled is not None:
+            results.append(to_result(original, throttled))
+            continue
+
+        if asyncio.iscoroutinefunction(match.func):
+            # Placeholder, filled in once the async views have run.
+            results.append(None)
+            pending.append((len(results) - 1, original, sub, match))
+        else:
+            responses[len(results)] = response = call_view(sub, match)
+            results.append(to_result(original, response))
+
+    if pending:
+        done = async_to_sync(gather_views)([(sub, match) for _, _, sub, match in pending])
+        for (index, original, _, _), response in zip(pending, done):
+            responses[index] = response
+            results[index] = to_result(original, response)
+
+    cookies = SimpleCookie()
+    for index in sorted(responses):
+        cookies.update(responses[index].cookies)
+    for sub in subs:
+        # get_token() in a sub-request: let CsrfViewMiddleware set the cookie
+        # on the batch response.
+        if sub.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            request.META["CSRF_COOKIE"] = sub.META["CSRF_COOKIE"]
+            request.META["CSRF_COOKIE_NEEDS_UPDATE"] = True
+    return results, cookies
+
+
+def call_view(sub, match):
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            response = response.render()
+    except Exception as exc:
+        response = response_for_exception(sub, exc)
+    return response
+
+
+async def gather_views(calls):
+    async def call(sub, match):
+        try:
+            response = await match.func(sub, *match.args, **match.kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+        except Exception as exc:
+            response = response_for_exception(sub, exc)
+        return response
+
+    return await asyncio.gather(*(call(sub, match) for sub, match in calls))
+
+
+def to_result(path, response):
+    if response.streaming:
+        return error_result(path, 400, "Streaming responses can't be batched.")
+    content_type = response.get("Content-Type", "")
+    if content_type.startswith("application/json"):
+        # Already serialized: embed the bytes, don't parse them back.
+        body = orjson.Fragment(response.content) if response.content else None
+    else:
+        body = response.content.decode(response.charset, "replace")
+    headers = {name: value for name, value in response.items() if name in ("Content-Type", "Location")}
+    return {
+        "path": path,
+        "status": response.status_code,
+        "headers": headers,
+        "body": body,
+    }
+
+
+def error_result(path, status, message):
+    return {"path": path, "status": status, "headers": {}, "body": {"error": message}}
@@ -0,0 +1,246 @@
+"""
+Two-tier cache: a small in-process LRU in front of a shared backend.
+
+Configured as the ``default`` cache (see ``CACHES`` in settings), so
+everything already using ``django.core.cache.cache`` — version tags, the
+``{% cache %}`` fragments, the home feed — goes through it:
+
+    local   bounded LRU per worker (LOCAL_MAX_ENTRIES), entries live at most
+            LOCAL_TIMEOUT seconds. Hits cost an unpickle, no I/O.
+    shared  any Django cache alias (OPTIONS["SHARED"]): file-based by default,
+            Redis (or anything speaking its protocol) via CACHE_URL.
+
+Writes go to both tiers. Another worker's write/delete becomes visible here
+once the local entry times out, so LOCAL_TIMEOUT is the staleness bound;
+keys that carry a version tag (OTT/versions.py) don't go stale at all, as
+the tags themselves are read from the shared tier.
+
+``get_or_compute()`` adds stampede protection for hot keys:
+
+    * single flight: only the worker holding ``lock:<key>`` in the shared
+      tier recomputes; the others keep serving the previous value, or wait
+      briefly for the winner on a cold miss. On Redis the lock is an atomic
+      ``add``; FileBasedCache's ``add`` is a check then a write, so there the
+      lock is a file created with O_EXCL next to the cache files instead
+      (atomic on a local disk, i.e. for the workers of one host);
+    * probabilistic early expiration ("XFetch"): each reader may decide to
+      refresh a little before expiry, with a probability that grows as expiry
+      nears and with how long the value takes to compute, so refreshes are
+      spread out instead of all landing at the expiry instant.
+"""
+import math
+import os
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+_MISSING = object()
+
+# Django hands out one cache instance per thread; the LRU is per process
+# (like LocMemCache's storage), shared by all threads of a worker.
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+class LocalLRU:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, payload = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout=None):
+        # Pickled so callers can't mutate what the next hit gets back.
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        ttl = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = options.get("SHARED", "shared")
+        with _local_caches_lock:
+            self.local = _local_caches.setdefault((server, self._shared_alias), LocalLRU(
+                max_entries=int(options.get("LOCAL_MAX_ENTRIES", 1000)),
+                timeout=float(options.get("LOCAL_TIMEOUT", 5)),
+            ))
+        self.lock_timeout = int(options.get("LOCK_TIMEOUT", 30))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_key(self, key, version):
+        return self.shared.make_and_validate_key(key, version=version)
+
+    def _local_timeout(self, timeout):
+        timeout = self._shared_timeout(timeout)
+        return None if timeout is None else max(0, timeout)
+
+    # -------------------------
+    # BaseCache API
+    # -------------------------
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.local.set(local_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=self._shared_timeout(timeout), version=version)
+        self.local.set(self._local_key(key, version), value, self._local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=self._shared_timeout(timeout), version=version)
+        if added:
+            self.local.set(self._local_key(key, version), value, self._local_timeout(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=self._shared_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self._local_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def _shared_timeout(self, timeout):
+        # Our own TIMEOUT applies, not the shared alias' default.
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # -------------------------
+    # Stampede protection
+    # -------------------------
+    def get_or_compute(self, key, compute, timeout, beta=1.0, version=None):
+        """
+        ``compute()``'s value, cached ``timeout`` seconds. Entries are kept
+        for another ``timeout`` past their soft expiry so there is always
+        something to serve while the single recomputing worker runs.
+        """
+        entry = self.get(key, version=version)
+        if entry is not None:
+            value, delta, expires = entry
+            # XFetch: -log(U) is exponential, so early refresh is rare until
+            # expiry is within a few multiples of the compute time.
+            if time.time() - delta * beta * math.log(1.0 - random.random()) < expires:
+                return value
+            if not self._acquire(key, version):
+                return value
+            return self._recompute(key, compute, timeout, version)
+
+        if self._acquire(key, version):
+            return self._recompute(key, compute, timeout, version)
+        # Cold miss while another worker computes: wait for it a little.
+        deadline = time.monotonic() + min(self.lock_timeout, 5)
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.shared.get(key, version=version)
+            if entry is not None:
+                return entry[0]
+        return compute()
+
+    def _acquire(self, key, version):
+        if not isinstance(self.shared, FileBasedCache):
+            return self.shared.add(f"lock:{key}", 1, timeout=self.lock_timeout, version=version)
+        path = self._lock_file(key, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                pass
+            try:
+                # Left behind by a worker that died mid-compute: take it over.
+                if os.path.getmtime(path) > time.time() - self.lock_timeout:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return False
+
+    def _release(self, key, version):
+        if not isinstance(self.shared, FileBasedCache):
+            self.shared.delete(f"lock:{key}", version=version)
+            return
+        try:
+            os.remove(self._lock_file(key, version))
+        except FileNotFoundError:
+            pass
+
+    def _lock_file(self, key, version):
+        # Not a ".djcache" name, so the cache's culling and clear() leave it alone.
+        return self.shared._key_to_file(f"lock:{key}", version) + ".lock"
+
+    def _recompute(self, key, compute, timeout, version):
+        try:
+            started = time.time()
+            value = compute()
+            now = time.time()
+            self.set(key, (value, now - started, now + timeout), timeout=2 * timeout, version=version)
+            return value
+        finally:
+            self._release(key, version)
+
+
+def get_or_compute(key, compute, timeout, **kwargs):
+    """
+    ``TieredCache.get_or_compute`` on the default cache; plain
+    ``get_or_set`` when another backend is configured (e.g. in tests).
+    """
+    cache = caches["default"]
+    if isinstance(cache, TieredCache):
+        return cache.get_or_compute(key, compute, timeout, **kwargs)
+    return cache.get_or_set(key, compute, timeout, version=kwargs.get("version"))
@@ -0,0 +1,140 @@
+"""
+Streaming CSV / JSONL exports for staff (``/exports/<name>/`` and
+``manage.py export_data``).
+
+Rows come from ``values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)``,
+so neither model instances nor the full result set are held in memory.
+They are encoded into ~64 KB blocks and, optionally, gzip-compressed on
+the fly. An export of any size runs in constant memory and starts sending
+bytes immediately.
+
+Over HTTP, exports need a worker that keeps heartbeating while a response
+streams: the gthread (default) and uvicorn presets in gunicorn.conf.py,
+where GUNICORN_TIMEOUT doesn't bound a request. A sync worker is killed
+after GUNICORN_TIMEOUT seconds whatever it is doing, so with that preset
+set ``EXPORTS_OVER_HTTP=false`` and ``/exports/`` answers 503; the
+management command works everywhere.
+
+CSV cells starting with ``=``, ``+``, ``-``, ``@``, tab or CR are prefixed
+with ``'`` so spreadsheets show user-supplied text (usernames, movie
+titles) instead of evaluating it as a formula.
+"""
+import csv
+import zlib
+from datetime import datetime
+
+from .models import User, ViewHistory, Watchlist
+from .renderers import dumps
+
+EXPORT_CHUNK_SIZE = 2000
+BLOCK_SIZE = 64 * 1024
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+# Leading characters that make spreadsheet apps treat a CSV cell as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# name -> (queryset factory, [(column, lookup), ...])
+EXPORTS = {
+    "users": (
+        lambda: User.objects.order_by("id"),
+        [
+            ("id", "id"),
+            ("email", "email"),
+            ("username", "username"),
+            ("is_staff", "is_staff"),
+            ("is_blocked", "is_blocked"),
+            ("is_active", "is_active"),
+            ("last_login", "last_login"),
+            ("last_seen", "activity__last_seen"),
+        ],
+    ),
+    "history": (
+        lambda: ViewHistory.objects.order_by("id"),
+        [
+            ("id", "id"),
+            ("user_id", "user_id"),
+            ("user_email", "user__email"),
+            ("movie_id", "movie_id"),
+            ("movie_title", "movie__title"),
+            ("date", "date"),
+        ],
+    ),
+    "watchlist": (
+        lambda: Watchlist.objects.order_by("id"),
+        [
+            ("id", "id"),
+            ("user_id", "user_id"),
+            ("user_email", "user__email"),
+            ("movie_id", "movie_id"),
+            ("movie_title", "movie__title"),
+        ],
+    ),
+}
+
+
+class _Line:
+    """File-like sink for csv.writer: returns what it was given."""
+
+    def write(self, value):
+        return value
+
+
+def rows(name):
+    queryset, columns = EXPORTS[name]
+    return queryset().values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_lines(name):
+    _, columns = EXPORTS[name]
+    writer = csv.writer(_Line())
+    yield writer.writerow([column for column, _ in columns])
+    for row in rows(name):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def _jsonl_lines(name):
+    _, columns = EXPORTS[name]
+    names = [column for column, _ in columns]
+    for row in rows(name):
+        yield dumps(dict(zip(names, row))) + b"\n"
+
+
+def _blocks(lines):
+    block, size = [], 0
+    for line in lines:
+        if isinstance(line, str):
+            line = line.encode()
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield b"".join(block)
+            block, size = [], 0
+    if block:
+        yield b"".join(block)
+
+
+def _gzipped(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(name, fmt="csv", gzip=False):
+    """Byte blocks of the ``name`` export in ``fmt``, gzipped if asked."""
+    lines = _csv_lines(name) if fmt == "csv" else _jsonl_lines(name)
+    blocks = _blocks(lines)
+    return _gzipped(blocks) if gzip else blocks
+
+
+def export_filename(name, fmt, gzip=False):
+    return f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{fmt}" + (".gz" if gzip else "")
@@ -0,0 +1,62 @@
+"""
+Home feed: several named rails of movies in one response.
+
+Shared rails (same for everyone) are computed once per catalog version and
+kept in the cache as Movie instances. Only the per-user rails are queried
+per request, so a feed costs the same fixed number of queries however many
+rails it has:
+
+    shared rails     0 queries (cache hit) / 1 per rail (miss)
+    watchlist        1 query
+    recently watched 2 queries (latest view per movie, then the movies)
+"""
+from django.db.models import Max
+
+from .cache import get_or_compute
+from .models import Movie, ViewHistory
+from .versions import CATALOG, get_version
+
+RAIL_SIZE = 20
+# Upper bound on staleness for data that changes without a catalog bump
+# (e.g. view_count incremented with F()).
+SHARED_RAILS_TIMEOUT = 300
+
+SHARED_RAILS = [
+    ("newest", "New Releases", lambda: Movie.objects.select_related("stats").order_by("-id")),
+    ("most_viewed", "Most Viewed", lambda: Movie.objects.select_related("stats").order_by("-view_count", "-id")),
+]
+
+
+def shared_rails():
+    # Hot key for every home page load: single-flight recompute (OTT/cache.py).
+    return get_or_compute(
+        f"home_feed:shared:{get_version(CATALOG)}",
+        lambda: [(name, title, list(queryset()[:RAIL_SIZE])) for name, title, queryset in SHARED_RAILS],
+        SHARED_RAILS_TIMEOUT,
+    )
+
+
+def watchlist_rail(user):
+    items = user.watchlist_items.select_related("movie", "movie__stats").order_by("-id")[:RAIL_SIZE]
+    return [item.movie for item in items]
+
+
+def recently_watched_rail(user):
+    latest = list(
+        ViewHistory.objects.filter(user=user)
+        .values("movie_id")
+        .annotate(last_viewed=Max("date"))
+        .order_by("-last_viewed")
+        .values_list("movie_id", flat=True)[:RAIL_SIZE]
+    )
+    movies = Movie.objects.select_related("stats").in_bulk(latest)
+    return [movies[movie_id] for movie_id in latest if movie_id in movies]
+
+
+def home_feed(user):
+    """``[(name, title, [Movie, ...]), ...]`` for this user."""
+    rails = list(shared_rails())
+    if user.is_authenticated:
+        rails.append(("watchlist", "My List", watchlist_rail(user)))
+        rails.append(("recently_watched", "Recently Watched", recently_watched_rail(user)))
+    return rails
@@ -0,0 +1,128 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark mixed read/write SQLite traffic with the default rollback "
+        "journal vs. the tuned SQLITE_PRAGMAS (WAL, synchronous=NORMAL, ...)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--write-ratio", type=float, default=0.2,
+                            help="Fraction of operations that are writes (0..1).")
+        parser.add_argument("--rows", type=int, default=10000)
+
+    def handle(self, *args, **opts):
+        profiles = [
+            ("default", {}),
+            ("tuned", settings.SQLITE_PRAGMAS),
+        ]
+        self.stdout.write(
+            f"{opts['threads']} threads, {opts['seconds']}s, "
+            f"{int(opts['write_ratio'] * 100)}% writes, {opts['rows']} rows\n"
+        )
+        for label, pragmas in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self.seed(path, opts["rows"])
+                result = self.run_profile(path, pragmas, opts)
+            self.report(label, result, opts["seconds"])
+
+    # -------------------------
+    # Setup
+    # -------------------------
+    def connect(self, path, pragmas):
+        # Same python-side busy wait Django uses by default.
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def seed(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE movie (id INTEGER PRIMARY KEY, title TEXT, description TEXT, view_count INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO movie (id, title, description, view_count) VALUES (?, ?, ?, 0)",
+            ((i, f"Movie {i}", "x" * 200) for i in range(1, rows + 1)),
+        )
+        conn.commit()
+        conn.close()
+
+    # -------------------------
+    # Workload
+    # -------------------------
+    def run_profile(self, path, pragmas, opts):
+        deadline = time.perf_counter() + opts["seconds"]
+        results = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            conn = self.connect(path, pragmas)
+            reads = writes = errors = 0
+            latencies = []
+            while time.perf_counter() < deadline:
+                movie_id = rng.randint(1, opts["rows"])
+                started = time.perf_counter()
+                try:
+                    if rng.random() < opts["write_ratio"]:
+                        conn.execute("BEGIN IMMEDIATE")
+                        conn.execute("UPDATE movie SET view_count = view_count + 1 WHERE id = ?", (movie_id,))
+                        conn.execute("COMMIT")
+                        writes += 1
+                    else:
+                        conn.execute(
+                            "SELECT id, title, description, view_count FROM movie WHERE id >= ? LIMIT 20",
+                            (movie_id,),
+                        ).fetchall()
+                        reads += 1
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+            conn.close()
+            with lock:
+                results.append((reads, writes, errors, latencies))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(opts["threads"])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        latencies = sorted(lat for *_, lats in results for lat in lats)
+        return {
+            "reads": sum(r[0] for r in results),
+            "writes": sum(r[1] for r in results),
+            "errors": sum(r[2] for r in results),
+            "latencies": latencies,
+        }
+
+    def report(self, label, result, seconds):
+        lats = result["latencies"]
+
+        def pct(p):
+            if not lats:
+                return 0.0
+            return lats[min(len(lats) - 1, int(len(lats) * p))] * 1000
+
+        total = result["reads"] + result["writes"]
+        self.stdout.write(
+            f"{label:>8}: {total / seconds:9.0f} ops/s  "
+            f"reads={result['reads']} writes={result['writes']} locked={result['errors']}  "
+            f"p50={pct(0.50):.2f}ms p99={pct(0.99):.2f}ms"
+        )
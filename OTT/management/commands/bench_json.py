@@ -0,0 +1,70 @@
+import gzip
+import json
+import time
+
+import brotli
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+from OTT.models import Movie
+from OTT.renderers import ORJSONRenderer
+from OTT.serializers import MovieSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark JSON rendering (stdlib / DRF vs orjson) and bytes on the wire "
+        "(raw / gzip / brotli) for a movie list payload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--movies", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **opts):
+        # Unsaved instances: measures serialization only, no database involved.
+        movies = [
+            Movie(
+                id=i,
+                title=f"Movie title {i}",
+                description=f"Description of movie {i}. " * 6,
+                view_count=i * 7,
+            )
+            for i in range(1, opts["movies"] + 1)
+        ]
+        data = MovieSerializer(movies, many=True).data
+        self.stdout.write(f"{len(data)} movies, best of {opts['repeat']}\n")
+
+        renderers = [
+            ("JsonResponse (stdlib)", lambda d: json.dumps(d, cls=DjangoJSONEncoder).encode()),
+            ("DRF JSONRenderer", lambda d: JSONRenderer().render(d)),
+            ("ORJSONRenderer", lambda d: ORJSONRenderer().render(d)),
+        ]
+        body = b""
+        for label, render in renderers:
+            best = self.best_of(opts["repeat"], render, data)
+            body = render(data)
+            self.stdout.write(f"{label:>22}: {best * 1000:8.1f} ms  {len(body):>10,} bytes")
+
+        self.stdout.write("")
+        raw = len(body)
+        encoders = [
+            ("gzip (level 6)", lambda b: gzip.compress(b, compresslevel=6)),
+            ("brotli (quality 5)", lambda b: brotli.compress(b, quality=5)),
+        ]
+        for label, encode in encoders:
+            best = self.best_of(opts["repeat"], encode, body)
+            size = len(encode(body))
+            self.stdout.write(
+                f"{label:>22}: {best * 1000:8.1f} ms  {size:>10,} bytes ({size / raw:.1%} of raw)"
+            )
+
+    @staticmethod
+    def best_of(repeat, fn, arg):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn(arg)
+            best = min(best, time.perf_counter() - started)
+        return best
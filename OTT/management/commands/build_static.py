@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStatic
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from PIL import Image
+
+# Source image -> widths of the WebP variants templates reference
+# (``images/banner-<width>.webp``).
+RESPONSIVE_IMAGES = {
+    "images/banner.jpg": (480, 800, 1200),
+}
+WEBP_QUALITY = 78
+# What settings.py configures when DEBUG is off; the build always uses it.
+MANIFEST_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+
+class Command(BaseCommand):
+    help = (
+        "Production static build: responsive WebP variants, then collectstatic "
+        "(content-hashed names + gzip/Brotli siblings via WhiteNoise)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images-only", action="store_true",
+                            help="Only (re)generate the WebP variants.")
+
+    def handle(self, *args, **opts):
+        static_dir = Path(settings.BASE_DIR) / "OTT" / "static"
+        for source, widths in RESPONSIVE_IMAGES.items():
+            self.build_variants(static_dir / source, widths)
+
+        if opts["images_only"]:
+            return
+
+        # The build runs with whatever DEBUG the environment has (True by
+        # default), but must always fingerprint and precompress.
+        collectstatic = CollectStatic()
+        if not isinstance(staticfiles_storage, ManifestFilesMixin):
+            collectstatic.storage = import_string(MANIFEST_STORAGE)()
+        call_command(collectstatic, interactive=False, verbosity=opts["verbosity"])
+        self.report(Path(settings.STATIC_ROOT))
+
+    def build_variants(self, source, widths):
+        with Image.open(source) as img:
+            img = img.convert("RGB")
+            for width in widths:
+                target = source.with_name(f"{source.stem}-{width}.webp")
+                if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+                    continue
+                # Never upscale: small sources just get re-encoded.
+                height = round(img.height * min(width, img.width) / img.width)
+                variant = img.resize((min(width, img.width), height), Image.LANCZOS)
+                variant.save(target, "WEBP", quality=WEBP_QUALITY, method=6)
+                self.stdout.write(f"{target.name}: {target.stat().st_size // 1024} KB")
+
+    def report(self, root):
+        files = [p for p in root.rglob("*") if p.is_file()]
+        gz = sum(1 for p in files if p.suffix == ".gz")
+        br = sum(1 for p in files if p.suffix == ".br")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(files)} files in {root} ({gz} gzip, {br} brotli)"
+        ))
+        if not br:
+            self.stdout.write(self.style.WARNING("No .br files written: is the Brotli package installed?"))
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from OTT.exports import EXPORTS, FORMATS, export_filename, export_stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream an export (users, history, watchlist) as CSV or JSONL to a "
+        "file or stdout, in constant memory. Same output as /exports/<name>/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", "-o",
+                            help="File to write; '-' for stdout. Default: <name>-<timestamp>.<format>[.gz]")
+
+    def handle(self, *args, **opts):
+        name, fmt, gzip = opts["name"], opts["format"], opts["gzip"]
+        output = opts["output"] or export_filename(name, fmt, gzip)
+
+        started = time.perf_counter()
+        written = 0
+        try:
+            out = sys.stdout.buffer if output == "-" else open(output, "wb")
+        except OSError as exc:
+            raise CommandError(f"Can't write {output}: {exc}")
+        try:
+            for block in export_stream(name, fmt, gzip):
+                out.write(block)
+                written += len(block)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {written / 1024 / 1024:.1f} MB -> {output} in {time.perf_counter() - started:.1f}s"
+            ))
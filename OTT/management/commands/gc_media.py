@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from OTT.media_gc import drain, reconcile
+from OTT.models import MediaDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete queued orphaned media (replaced or deleted movie/profile "
+        "files) in rate-limited batches. --reconcile first scans storage "
+        "for files no row references and queues them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--rate", type=float, default=10.0, help="Max deletions per second.")
+        parser.add_argument("--limit", type=int, help="Stop after this many queue entries.")
+        parser.add_argument("--grace", type=int, default=settings.MEDIA_GC_GRACE_SECONDS,
+                            help="Only touch media unreferenced for this many seconds.")
+        parser.add_argument("--reconcile", action="store_true")
+        parser.add_argument("--no-cloudinary", action="store_true", help="Reconcile: skip the Cloudinary scan.")
+        parser.add_argument("--no-storage", action="store_true", help="Reconcile: skip the default_storage scan.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted.")
+
+    def handle(self, *args, **opts):
+        if opts["reconcile"]:
+            queued = reconcile(opts["grace"], cloudinary=not opts["no_cloudinary"], storage=not opts["no_storage"])
+            self.stdout.write(f"reconcile: queued {queued} unreferenced file(s)")
+
+        self.stdout.write(f"queue: {MediaDeletion.objects.count()} entries")
+
+        def log(deleted, kept, failed):
+            self.stdout.write(f"  batch: deleted {deleted}, still referenced {kept}, failed {failed}")
+
+        deleted, kept, failed = drain(
+            batch_size=opts["batch_size"], rate=opts["rate"], grace=opts["grace"],
+            limit=opts["limit"], dry_run=opts["dry_run"], log=log,
+        )
+        verb = "would delete" if opts["dry_run"] else "deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted}, dropped {kept} still referenced, {failed} failed"
+        ))
@@ -0,0 +1,301 @@
+import random
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.models import Max
+
+from OTT import stats, suggest
+from OTT.models import Movie, User, UserActivity, ViewHistory, Watchlist
+from OTT.versions import CATALOG, bump_version
+
+# --size presets: (users, movies, views)
+SIZES = {
+    "small": (10_000, 2_000, 1_000_000),
+    "medium": (200_000, 20_000, 20_000_000),
+    "production": (2_000_000, 150_000, 300_000_000),
+}
+# Default end of the generated history: a fixed day, not today, so the
+# same --seed loads the same dates whenever it runs.
+DATASET_EPOCH = "2025-01-01"
+# Rows per INSERT statement on backends without a fast executemany.
+ROWS_PER_STATEMENT = 1000
+
+WORDS = (
+    "silent dark last lost red broken hidden golden final wild cold iron "
+    "secret burning endless frozen midnight crimson hollow savage distant "
+    "river city empire night storm shadow kingdom harbor garden machine "
+    "echo legacy signal horizon protocol dynasty frontier witness code"
+).split()
+NAMES = (
+    "alex sam jordan taylor riya arjun meera kabir anya leo maya noah zara "
+    "omar ivy ethan aisha rohan nina vikram lena dev sara kiran"
+).split()
+
+
+def zipf_weights(n, s):
+    """Cumulative weights for ranks 1..n with P(rank k) ~ 1 / k**s."""
+    return list(accumulate(1.0 / k ** s for k in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a synthetic dataset (users + activity, movies, Zipf-distributed "
+        "view history, watchlists) for local scaling tests. Deterministic for "
+        "a given --seed, --end and starting database. Rows are written with raw "
+        "executemany / multi-row INSERTs in large transactions, secondary "
+        "indexes are dropped for the load and rebuilt afterwards, and one "
+        "password hash is shared by every generated user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", choices=sorted(SIZES), default="small",
+                            help="Preset volumes; small=10k users/2k movies/1M views, "
+                                 "production=2M/150k/300M.")
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--movies", type=int)
+        parser.add_argument("--views", type=int, help="ViewHistory rows.")
+        parser.add_argument("--watchlist", type=float, default=6.0, help="Mean watchlist entries per user.")
+        parser.add_argument("--movie-skew", type=float, default=1.1,
+                            help="Zipf exponent of movie popularity.")
+        parser.add_argument("--user-skew", type=float, default=0.7,
+                            help="Zipf exponent of how views spread over users.")
+        parser.add_argument("--days", type=int, default=365, help="History spans this many days up to --end.")
+        parser.add_argument("--end", type=date.fromisoformat, default=date.fromisoformat(DATASET_EPOCH),
+                            help=f"Last day of the history, YYYY-MM-DD (default {DATASET_EPOCH}).")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--password", default="dataset", help="Password of every generated user.")
+        parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per transaction.")
+        parser.add_argument("--keep-indexes", action="store_true",
+                            help="Insert with all indexes in place (slower; for comparison).")
+
+    def handle(self, *args, **opts):
+        users, movies, views = SIZES[opts["size"]]
+        self.users = opts["users"] if opts["users"] is not None else users
+        self.movies = opts["movies"] if opts["movies"] is not None else movies
+        self.views = opts["views"] if opts["views"] is not None else views
+        if self.movies < 1 and (self.views or opts["watchlist"]):
+            raise CommandError("Views and watchlists need at least one movie.")
+
+        self.opts = opts
+        self.seed = opts["seed"]
+        self.batch_size = opts["batch_size"]
+        self.db = router.db_for_write(User)
+        self.connection = connections[self.db]
+        self.quote = self.connection.ops.quote_name
+        if User.objects.using(self.db).filter(email=self.email(1)).exists():
+            raise CommandError(f"A dataset with --seed {self.seed} is already loaded.")
+
+        self.end = datetime.combine(opts["end"], datetime.min.time(), tzinfo=dt_timezone.utc)
+        self.start = self.end - timedelta(days=opts["days"])
+        started = time.perf_counter()
+
+        models = [User, UserActivity, Movie, ViewHistory, Watchlist]
+        dropped = [] if opts["keep_indexes"] else self.drop_indexes(models)
+        try:
+            user_ids = self.load_users()
+            movie_ids = self.load_movies()
+            view_counts = self.load_views(user_ids, movie_ids)
+            self.load_watchlists(user_ids, movie_ids)
+            self.set_view_counts(view_counts)
+            self.reset_sequences(models)
+        finally:
+            self.restore_indexes(dropped)
+
+        if self.connection.vendor in ("sqlite", "postgresql"):
+            with self.connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        # Raw inserts send no signals: build the movies' stats rows, drop
+        # cached catalog pages / title indexes.
+        stats.reconcile()
+        bump_version(CATALOG)
+        suggest.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {self.users} users, {self.movies} movies, {self.views} views "
+            f"in {time.perf_counter() - started:.1f}s (password: {opts['password']!r})"
+        ))
+
+    # -------------------------
+    # Generators
+    # -------------------------
+    def rng(self, table):
+        # One stream per table, so changing one volume doesn't reshuffle the rest.
+        return random.Random(f"{self.seed}:{table}")
+
+    def email(self, n):
+        return f"user{n}.s{self.seed}@dataset.invalid"
+
+    def moment(self, rng):
+        return self.start + (self.end - self.start) * rng.random()
+
+    def next_id(self, model):
+        return (model.objects.using(self.db).aggregate(Max("id"))["id__max"] or 0) + 1
+
+    def load_users(self):
+        rng = self.rng("users")
+        # Hashed once and shared by every row; a fixed salt keeps the output reproducible.
+        password = make_password(self.opts["password"], salt=f"dataset{self.seed}")
+        adapt = self.connection.ops.adapt_datetimefield_value
+        first = self.next_id(User)
+        for offset in range(0, self.users, self.batch_size):
+            users, activity = [], []
+            for n in range(offset + 1, min(self.users, offset + self.batch_size) + 1):
+                user_id = first + n - 1
+                last_seen = self.moment(rng)
+                users.append((
+                    user_id, password, adapt(last_seen) if rng.random() < 0.8 else None, False,
+                    f"{rng.choice(NAMES)}{n}", self.email(n), True, False, False, rng.random() < 0.005,
+                ))
+                activity.append((user_id, adapt(last_seen)))
+            with transaction.atomic(using=self.db), self.connection.cursor() as cursor:
+                self.insert(cursor, User, [
+                    "id", "password", "last_login", "is_superuser", "username", "email",
+                    "is_active", "is_admin", "is_staff", "is_blocked",
+                ], users)
+                self.insert(cursor, UserActivity, ["user_id", "last_seen"], activity)
+            self.progress("users", offset + len(users), self.users)
+        return list(range(first, first + self.users))
+
+    def load_movies(self):
+        rng = self.rng("movies")
+        first = self.next_id(Movie)
+        for offset in range(0, self.movies, self.batch_size):
+            rows = []
+            for n in range(offset + 1, min(self.movies, offset + self.batch_size) + 1):
+                words = rng.sample(WORDS, rng.randint(1, 3))
+                title = " ".join(words).title() + (f" {rng.randint(2, 4)}" if rng.random() < 0.1 else "")
+                rows.append((first + n - 1, title[:100], f"{title}: " + " ".join(rng.choices(WORDS, k=30)), 0))
+            with transaction.atomic(using=self.db), self.connection.cursor() as cursor:
+                self.insert(cursor, Movie, ["id", "title", "description", "view_count"], rows)
+            self.progress("movies", offset + len(rows), self.movies)
+        return list(range(first, first + self.movies))
+
+    def popularity(self, rng, ids, skew):
+        """``ids`` in a random popularity order, with Zipf cumulative weights."""
+        ranked = list(ids)
+        rng.shuffle(ranked)
+        return ranked, zipf_weights(len(ranked), skew)
+
+    def load_views(self, user_ids, movie_ids):
+        rng = self.rng("views")
+        movies, movie_weights = self.popularity(rng, movie_ids, self.opts["movie_skew"])
+        users, user_weights = self.popularity(rng, user_ids, self.opts["user_skew"])
+        adapt = self.connection.ops.adapt_datetimefield_value
+        step = (self.end - self.start) / max(1, self.views)
+        counts = Counter()
+        for offset in range(0, self.views if users else 0, self.batch_size):
+            size = min(self.batch_size, self.views - offset)
+            picked_movies = rng.choices(movies, cum_weights=movie_weights, k=size)
+            picked_users = rng.choices(users, cum_weights=user_weights, k=size)
+            # Dates grow with the id, like rows appended over time.
+            rows = [
+                (user_id, movie_id, adapt(self.start + step * (offset + i + rng.random())))
+                for i, (user_id, movie_id) in enumerate(zip(picked_users, picked_movies))
+            ]
+            counts.update(picked_movies)
+            with transaction.atomic(using=self.db), self.connection.cursor() as cursor:
+                self.insert(cursor, ViewHistory, ["user_id", "movie_id", "date"], rows)
+            self.progress("views", offset + size, self.views)
+        return counts
+
+    def load_watchlists(self, user_ids, movie_ids):
+        rng = self.rng("watchlist")
+        movies, weights = self.popularity(rng, movie_ids, self.opts["movie_skew"])
+        mean = self.opts["watchlist"]
+        rows, done = [], 0
+        for user_id in user_ids if mean > 0 else []:
+            wanted = min(len(movies), int(rng.expovariate(1 / mean)))
+            if wanted:
+                # Popular titles are watchlisted more; duplicates collapse.
+                picked = dict.fromkeys(rng.choices(movies, cum_weights=weights, k=wanted * 2))
+                rows.extend((user_id, movie_id) for movie_id in list(picked)[:wanted])
+            done += 1
+            if len(rows) >= self.batch_size or done == len(user_ids):
+                with transaction.atomic(using=self.db), self.connection.cursor() as cursor:
+                    self.insert(cursor, Watchlist, ["user_id", "movie_id"], rows)
+                rows = []
+                self.progress("watchlists", done, len(user_ids))
+
+    def set_view_counts(self, counts):
+        table, view_count, pk = (
+            self.quote(Movie._meta.db_table), self.quote("view_count"), self.quote(Movie._meta.pk.column),
+        )
+        items = list(counts.items())
+        for offset in range(0, len(items), self.batch_size):
+            with transaction.atomic(using=self.db), self.connection.cursor() as cursor:
+                cursor.executemany(
+                    f"UPDATE {table} SET {view_count} = {view_count} + %s WHERE {pk} = %s",
+                    [(count, movie_id) for movie_id, count in items[offset:offset + self.batch_size]],
+                )
+
+    # -------------------------
+    # SQL
+    # -------------------------
+    def insert(self, cursor, model, fields, rows):
+        if not rows:
+            return
+        columns = ", ".join(self.quote(model._meta.get_field(name).column) for name in fields)
+        sql = f"INSERT INTO {self.quote(model._meta.db_table)} ({columns}) VALUES "
+        placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+        if self.connection.vendor == "sqlite":
+            # In-process: executemany is one prepared statement stepped per row.
+            cursor.executemany(sql + placeholders, rows)
+            return
+        for start in range(0, len(rows), ROWS_PER_STATEMENT):
+            chunk = rows[start:start + ROWS_PER_STATEMENT]
+            cursor.execute(sql + ", ".join([placeholders] * len(chunk)), [value for row in chunk for value in row])
+
+    def secondary_indexes(self, cursor, table):
+        """[(name, CREATE statement)] of indexes that can be dropped and rebuilt."""
+        vendor = self.connection.vendor
+        if vendor == "sqlite":
+            # sql is NULL for the automatic indexes behind UNIQUE / PRIMARY KEY.
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+                [table],
+            )
+        elif vendor == "postgresql":
+            # Skip indexes that back a constraint (primary key, unique_together).
+            cursor.execute(
+                "SELECT i.relname, pg_get_indexdef(x.indexrelid) FROM pg_index x "
+                "JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE x.indrelid = to_regclass(%s) "
+                "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+                [self.quote(table)],
+            )
+        else:
+            return []
+        return cursor.fetchall()
+
+    def drop_indexes(self, models):
+        dropped = []
+        with self.connection.cursor() as cursor:
+            for model in models:
+                for name, create in self.secondary_indexes(cursor, model._meta.db_table):
+                    cursor.execute(f"DROP INDEX {self.quote(name)}")
+                    dropped.append((name, create))
+        if not dropped and self.connection.vendor not in ("sqlite", "postgresql"):
+            self.stdout.write(f"Keeping indexes on {self.connection.vendor}.")
+        return dropped
+
+    def restore_indexes(self, dropped):
+        with self.connection.cursor() as cursor:
+            for name, create in dropped:
+                started = time.perf_counter()
+                cursor.execute(create)
+                self.stdout.write(f"  index {name}: {time.perf_counter() - started:.1f}s")
+
+    def reset_sequences(self, models):
+        # Explicit ids were inserted; move the backends' id sequences past them.
+        with self.connection.cursor() as cursor:
+            for sql in self.connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def progress(self, label, done, total):
+        self.stdout.write(f"  {label}: {done}/{total}")
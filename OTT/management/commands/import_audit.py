@@ -0,0 +1,57 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Import-time audit: imports a module in a fresh interpreter with "
+        "`python -X importtime` and reports the cumulative cost per module "
+        "and the self time per top-level package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="django_back.wsgi")
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument("--no-warmup", action="store_true",
+                            help="Set DJANGO_WARMUP=false (measure the bare import).")
+
+    def handle(self, *args, **opts):
+        env = dict(os.environ)
+        if opts["no_warmup"]:
+            env["DJANGO_WARMUP"] = "false"
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {opts['module']}"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode:
+            raise CommandError(f"import {opts['module']} failed:\n{proc.stderr[-2000:]}")
+
+        modules = []
+        for line in proc.stderr.splitlines():
+            match = LINE.match(line)
+            if match:
+                self_us, cumulative_us, _, name = match.groups()
+                modules.append((name, int(self_us), int(cumulative_us)))
+        if not modules:
+            raise CommandError("No -X importtime output captured.")
+
+        by_package = Counter()
+        for name, self_us, _ in modules:
+            by_package[name.split(".")[0]] += self_us
+        total = sum(by_package.values())
+
+        self.stdout.write(f"import {opts['module']}: {total / 1000:.0f} ms over {len(modules)} modules\n")
+        self.stdout.write("Cumulative per module:")
+        for name, _, cumulative_us in sorted(modules, key=lambda m: -m[2])[:opts["limit"]]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+        self.stdout.write("\nSelf time per top-level package:")
+        for package, self_us in by_package.most_common(opts["limit"]):
+            self.stdout.write(f"  {self_us / 1000:8.1f} ms  {self_us / total:5.1%}  {package}")
@@ -0,0 +1,148 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import router, transaction
+from django.db.models.functions import Lower
+
+from OTT.models import User, UserActivity
+
+
+def _init_worker():
+    # Spawned (non-fork) workers start without Django configured.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _hash(password):
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users from a CSV with email,username,password columns. "
+        "Passwords are hashed in a process pool; users and their activity rows "
+        "are inserted with bulk_create, skipping emails that already exist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file, or '-' for stdin.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Password hashing processes (1 = hash inline).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate and de-duplicate only, write nothing.")
+
+    def handle(self, *args, **opts):
+        path = opts["csv_path"]
+        if path == "-":
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline="", encoding="utf-8-sig")
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}")
+
+        self.db = router.db_for_write(User)
+        self.seen = set()
+        self.stats = {"created": 0, "existing": 0, "duplicate": 0, "invalid": 0}
+        started = time.perf_counter()
+
+        self.workers = opts["workers"]
+        pool = None
+        if self.workers > 1 and not opts["dry_run"]:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        try:
+            reader = csv.DictReader(stream)
+            if not reader.fieldnames or "email" not in reader.fieldnames:
+                raise CommandError("CSV needs a header row with at least an 'email' column.")
+            while True:
+                rows = list(islice(reader, opts["batch_size"]))
+                if not rows:
+                    break
+                self.import_batch(rows, pool, opts["dry_run"])
+                self.stdout.write(
+                    "created={created} existing={existing} duplicate={duplicate} invalid={invalid}".format(**self.stats)
+                )
+        finally:
+            if pool:
+                pool.shutdown()
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['created']} users in {elapsed:.1f}s"
+            + (" (dry run)" if opts["dry_run"] else "")
+        ))
+
+    def import_batch(self, rows, pool, dry_run):
+        candidates = {}
+        for row in rows:
+            email = User.objects.normalize_email((row.get("email") or "").strip())
+            try:
+                validate_email(email)
+            except ValidationError:
+                self.stats["invalid"] += 1
+                continue
+            key = email.lower()
+            if key in self.seen or key in candidates:
+                self.stats["duplicate"] += 1
+                continue
+            candidates[key] = (email, (row.get("username") or "").strip() or None, row.get("password") or "")
+
+        # One set-based lookup per batch instead of an exists() per row,
+        # case-insensitive like the in-file check (ott_user_email_lower_idx).
+        existing = set(
+            User.objects.using(self.db)
+            .alias(email_lower=Lower("email"))
+            .filter(email_lower__in=list(candidates))
+            .annotate(key=Lower("email"))
+            .values_list("key", flat=True)
+        )
+        new = [v for k, v in candidates.items() if k not in existing]
+        self.stats["existing"] += len(candidates) - len(new)
+        self.seen.update(candidates)
+
+        if dry_run:
+            self.stats["created"] += len(new)
+            return
+        if not new:
+            return
+
+        passwords = [password for _, _, password in new]
+        if pool:
+            chunksize = max(1, len(passwords) // (self.workers * 4))
+            hashes = list(pool.map(_hash, passwords, chunksize=chunksize))
+        else:
+            hashes = [_hash(p) for p in passwords]
+
+        users = [
+            User(email=email, username=username, password=hashed)
+            for (email, username, _), hashed in zip(new, hashes)
+        ]
+        with transaction.atomic(using=self.db):
+            # bulk_create skips post_save, so create_user_activity doesn't run;
+            # the activity rows are bulk-inserted here instead.
+            created = User.objects.using(self.db).bulk_create(users)
+            if any(u.pk is None for u in created):
+                # Backends that can't return ids from a bulk insert.
+                ids = dict(
+                    User.objects.using(self.db)
+                    .filter(email__in=[u.email for u in created])
+                    .values_list("email", "id")
+                )
+                for u in created:
+                    u.pk = ids[u.email]
+            UserActivity.objects.using(self.db).bulk_create([UserActivity(user_id=u.pk) for u in created])
+        self.stats["created"] += len(created)
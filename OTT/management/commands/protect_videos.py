@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from OTT.models import MediaAsset, Movie
+
+
+class Command(BaseCommand):
+    help = (
+        "Turn movie videos uploaded before playback signing (public "
+        "'upload' type) into 'authenticated' Cloudinary assets, so they are "
+        "only reachable through expiring signed URLs. Updates the stored "
+        "references; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List the videos that would be converted.")
+
+    def handle(self, *args, **opts):
+        import cloudinary
+        import cloudinary.uploader
+
+        converted = failed = 0
+        # Distinct references: deduplicated uploads share one asset between movies.
+        videos = (
+            Movie.objects.filter(video_url__startswith="video/upload/")
+            .order_by().values_list("video_url", flat=True).distinct()
+        )
+        for video in videos:
+            old = video.get_prep_value()
+            if opts["dry_run"]:
+                self.stdout.write(f"  would convert {old}")
+                converted += 1
+                continue
+            try:
+                result = cloudinary.uploader.rename(
+                    video.public_id, video.public_id,
+                    resource_type="video", type="upload", to_type="authenticated",
+                )
+            except Exception as exc:
+                self.stderr.write(f"  {old}: {exc}")
+                failed += 1
+                continue
+            new = cloudinary.CloudinaryResource(
+                result["public_id"], version=str(result["version"]), format=result.get("format"),
+                type=result["type"], resource_type="video",
+            ).get_prep_value()
+            # update(): no pre_save, so the old reference isn't queued for deletion.
+            Movie.objects.filter(video_url=old).update(video_url=new)
+            MediaAsset.objects.filter(kind="ott.movie.video_url", reference=old).update(reference=new)
+            converted += 1
+
+        verb = "would convert" if opts["dry_run"] else "converted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {converted} video(s), {failed} failed"))
@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary into the SQLite replicas from DATABASE_REPLICA_URLS. "
+        "Stands in for real replication when testing the read/write router locally."
+    )
+
+    def handle(self, *args, **opts):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replica only works with a SQLite primary.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured (set DATABASE_REPLICA_URLS).")
+
+        source = sqlite3.connect(str(primary["NAME"]))
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = settings.DATABASES[alias]
+                if replica["ENGINE"] != "django.db.backends.sqlite3":
+                    self.stdout.write(f"Skipping {alias}: not SQLite.")
+                    continue
+                target = sqlite3.connect(str(replica["NAME"]))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f"{alias} <- default ({replica['NAME']})"))
+        finally:
+            source.close()
@@ -0,0 +1,276 @@
+"""
+Deferred deletion of orphaned media.
+
+Rows never delete their stored files themselves. Two things fill the
+``MediaDeletion`` queue instead:
+
+    * pre_save on Movie / User: a media field changed, so its old value is
+      queued (one indexed lookup, skipped for saves whose update_fields
+      don't touch media, e.g. last_login);
+    * post_delete on Movie / User: all of its media is queued.
+
+``manage.py gc_media`` drains the queue in rate-limited batches. Entries
+younger than MEDIA_GC_GRACE_SECONDS wait, so rolled-back saves and links
+still in flight settle first. Every entry is checked for references again
+right before deletion (``OTT.uploads.referenced``), because deduplicated
+uploads can share one stored asset between rows. ``--reconcile`` lists what
+is actually in storage and queues anything no row references.
+"""
+import posixpath
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import MediaAsset, MediaDeletion, Movie, User
+from .uploads import MOVIE_MEDIA, USER_MEDIA, referenced, stored_reference
+
+# Cloudinary's delete_resources takes at most 100 public ids per call.
+CLOUDINARY_BATCH = 100
+MAX_ATTEMPTS = 5
+
+
+def enqueue(backend, references):
+    references = {reference for reference in references if reference}
+    if references:
+        MediaDeletion.objects.bulk_create(
+            [MediaDeletion(backend=backend, reference=reference) for reference in references],
+            ignore_conflicts=True,
+        )
+
+
+# -------------------------
+# Signal receivers (connected in OttConfig.ready)
+# -------------------------
+def _replaced(sender, instance, fields, raw, update_fields):
+    if raw or instance._state.adding or instance.pk is None:
+        return []
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    if not fields:
+        return []
+    old = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if old is None:
+        return []
+    replaced = []
+    for field, old_value in zip(fields, old):
+        old_reference = stored_reference(old_value)
+        if old_reference and old_reference != stored_reference(getattr(instance, field)):
+            replaced.append(old_reference)
+    return replaced
+
+
+def movie_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    enqueue(MediaDeletion.CLOUDINARY, _replaced(sender, instance, MOVIE_MEDIA, raw, update_fields))
+
+
+def movie_post_delete(sender, instance, **kwargs):
+    enqueue(MediaDeletion.CLOUDINARY, [stored_reference(getattr(instance, field)) for field in MOVIE_MEDIA])
+
+
+def user_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    enqueue(MediaDeletion.STORAGE, _replaced(sender, instance, USER_MEDIA, raw, update_fields))
+
+
+def user_post_delete(sender, instance, **kwargs):
+    enqueue(MediaDeletion.STORAGE, [stored_reference(getattr(instance, field)) for field in USER_MEDIA])
+
+
+# -------------------------
+# References
+# -------------------------
+def _cloudinary_resource(reference):
+    return Movie._meta.get_field("video_url").parse_cloudinary_resource(reference)
+
+
+# -------------------------
+# Draining
+# -------------------------
+def _delete_cloudinary(references):
+    """Delete Cloudinary assets; returns {reference: error} for failures."""
+    import cloudinary.api
+
+    groups = {}
+    for reference in references:
+        resource = _cloudinary_resource(reference)
+        key = (resource.resource_type or "image", resource.type or "upload")
+        groups.setdefault(key, {})[resource.public_id] = reference
+
+    errors = {}
+    for (resource_type, delivery_type), by_id in groups.items():
+        ids = list(by_id)
+        for start in range(0, len(ids), CLOUDINARY_BATCH):
+            chunk = ids[start:start + CLOUDINARY_BATCH]
+            try:
+                result = cloudinary.api.delete_resources(chunk, resource_type=resource_type, type=delivery_type)
+            except Exception as exc:
+                errors.update({by_id[public_id]: str(exc) for public_id in chunk})
+                continue
+            for public_id, outcome in result.get("deleted", {}).items():
+                if outcome not in ("deleted", "not_found") and public_id in by_id:
+                    errors[by_id[public_id]] = outcome
+    return errors
+
+
+def _delete_storage(references):
+    errors = {}
+    for name in references:
+        try:
+            default_storage.delete(name)
+        except Exception as exc:
+            errors[name] = str(exc)
+    return errors
+
+
+DELETERS = {
+    MediaDeletion.CLOUDINARY: _delete_cloudinary,
+    MediaDeletion.STORAGE: _delete_storage,
+}
+
+
+def drain_batch(batch_size, grace, dry_run=False, after=0):
+    """
+    Process up to ``batch_size`` due entries with id > ``after``. Returns
+    ``((deleted, still referenced, failed), last id seen)``; nothing left
+    once the last id is None.
+    """
+    due = list(
+        MediaDeletion.objects
+        .filter(id__gt=after, enqueued_at__lte=timezone.now() - grace, attempts__lt=MAX_ATTEMPTS)
+        .order_by("id")[:batch_size]
+    )
+    if not due:
+        return (0, 0, 0), None
+    deleted = kept = failed = 0
+    for backend, deleter in DELETERS.items():
+        entries = [entry for entry in due if entry.backend == backend]
+        if not entries:
+            continue
+        in_use = referenced(backend, [entry.reference for entry in entries])
+        orphans = [entry for entry in entries if entry.reference not in in_use]
+        kept += len(entries) - len(orphans)
+        if dry_run:
+            deleted += len(orphans)
+            continue
+
+        errors = deleter([entry.reference for entry in orphans]) if orphans else {}
+        done = [entry.reference for entry in orphans if entry.reference not in errors]
+        MediaAsset.objects.filter(reference__in=done).delete()
+        MediaDeletion.objects.filter(
+            backend=backend, reference__in=[entry.reference for entry in entries if entry.reference not in errors],
+        ).delete()
+        for entry in orphans:
+            if entry.reference in errors:
+                entry.attempts += 1
+                entry.last_error = errors[entry.reference][:1000]
+                entry.save(update_fields=["attempts", "last_error"])
+        deleted += len(done)
+        failed += len(errors)
+    return (deleted, kept, failed), due[-1].id
+
+
+def drain(batch_size=100, rate=10.0, grace=None, limit=None, dry_run=False, log=None):
+    """
+    One pass over the due entries, at most ``rate`` deletions per second.
+    Failures are retried on the next run (up to MAX_ATTEMPTS), not in this one.
+    """
+    if grace is None:
+        grace = settings.MEDIA_GC_GRACE_SECONDS
+    grace = timedelta(seconds=grace) if isinstance(grace, (int, float)) else grace
+    totals = [0, 0, 0]
+    after = 0
+    while limit is None or sum(totals) < limit:
+        size = batch_size if limit is None else min(batch_size, limit - sum(totals))
+        started = time.monotonic()
+        counts, after = drain_batch(size, grace, dry_run, after)
+        if after is None:
+            break
+        totals = [total + count for total, count in zip(totals, counts)]
+        if log:
+            log(*counts)
+        # Rate limit: a batch of N deletions takes at least N / rate seconds.
+        pause = counts[0] / rate - (time.monotonic() - started)
+        if pause > 0 and not dry_run:
+            time.sleep(pause)
+    return tuple(totals)
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+def _cloudinary_orphans(cutoff):
+    import cloudinary
+    import cloudinary.api
+    from cloudinary_storage import app_settings
+
+    used = set()
+    for row in Movie.objects.values_list(*MOVIE_MEDIA):
+        for value in row:
+            if value:
+                resource = _cloudinary_resource(stored_reference(value))
+                used.add((resource.resource_type, resource.public_id))
+
+    # Videos are authenticated (OTT.signing); older ones may still be public.
+    for resource_type, delivery_type in (("image", "upload"), ("video", "upload"), ("video", "authenticated")):
+        cursor = None
+        while True:
+            page = cloudinary.api.resources(
+                resource_type=resource_type, type=delivery_type, max_results=500, tags=True, next_cursor=cursor,
+            )
+            for resource in page.get("resources", []):
+                if app_settings.MEDIA_TAG in resource.get("tags", []):
+                    continue  # default_storage (profile pictures): scanned below
+                if resource.get("created_at", "") > cutoff.strftime("%Y-%m-%dT%H:%M:%SZ"):
+                    continue  # may still be on its way into a row
+                if (resource_type, resource["public_id"]) in used:
+                    continue
+                yield cloudinary.CloudinaryResource(
+                    resource["public_id"], version=str(resource["version"]), format=resource.get("format"),
+                    type=resource["type"], resource_type=resource_type,
+                ).get_prep_value()
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+
+
+def _storage_orphans(cutoff):
+    used = set(User.objects.exclude(profile_pic="").exclude(profile_pic=None).values_list("profile_pic", flat=True))
+    pending = [User._meta.get_field("profile_pic").upload_to.rstrip("/")]
+    while pending:
+        path = pending.pop()
+        try:
+            directories, files = default_storage.listdir(path)
+        except FileNotFoundError:
+            continue
+        pending.extend(posixpath.join(path, directory) for directory in directories)
+        for filename in files:
+            name = posixpath.join(path, filename)
+            if name in used:
+                continue
+            try:
+                if default_storage.get_modified_time(name) > cutoff:
+                    continue
+            except (NotImplementedError, OSError):
+                pass
+            yield name
+
+
+def reconcile(grace=None, cloudinary=True, storage=True):
+    """Queue stored media no row references; returns how many were queued."""
+    if grace is None:
+        grace = settings.MEDIA_GC_GRACE_SECONDS
+    grace = timedelta(seconds=grace) if isinstance(grace, (int, float)) else grace
+    cutoff = timezone.now() - grace
+    queued = 0
+    for backend, enabled, orphans in (
+        (MediaDeletion.CLOUDINARY, cloudinary, _cloudinary_orphans),
+        (MediaDeletion.STORAGE, storage, _storage_orphans),
+    ):
+        if not enabled:
+            continue
+        found = list(orphans(cutoff))
+        enqueue(backend, found)
+        queued += len(found)
+    return queued
@@ -1,7 +1,22 @@
+import time
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.template.defaultfilters import filesizeformat
+from django.utils.cache import patch_vary_headers
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.utils import timezone
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, fall back to gzip only
+    brotli = None
+from django_back.routers import reset_pinning, restore_pinning, wrote_to_primary
 from OTT.models import UserActivity
+from OTT.ratelimit import throttle
+from OTT.renderers import ORJSONResponse
 class ActiveUserMiddleware:
     """
     Update the user's last_seen every time they make an authenticated request.
@@ -76,3 +91,190 @@ class UpdateLastSeenMiddleware:
                 pass
 
         return response
+
+
+class PrimaryPinningMiddleware:
+    """
+    Read-your-writes for the primary/replica router (django_back/routers.py).
+
+    Requests carrying a fresh pin cookie read from the primary. A request that
+    writes sets/extends the pin so the client's next reads (e.g. after
+    profile_update or change_password) don't hit a lagging replica.
+    """
+    cookie_name = "db_pin"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = self.is_pinned(request)
+        tokens = reset_pinning(pinned)
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary():
+                window = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+                response.set_cookie(
+                    self.cookie_name,
+                    str(int(time.time()) + window),
+                    max_age=window,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            restore_pinning(tokens)
+        return response
+
+    def is_pinned(self, request):
+        try:
+            return int(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class RequestSizeLimitMiddleware:
+    """
+    413 for request bodies over UPLOAD_MAX_REQUEST_SIZE, decided from
+    Content-Length before anything reads the body. Sits in front of
+    CsrfViewMiddleware: CSRF would otherwise parse the upload looking for
+    its token, and refuse it with a 403 instead.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        limit = settings.UPLOAD_MAX_REQUEST_SIZE
+        if length > limit:
+            return ORJSONResponse({"error": f"Upload is larger than {filesizeformat(limit)}."}, status=413)
+        return self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """
+    Per-URL-name token buckets by client IP and user (OTT/ratelimit.py).
+    Runs in process_view, so the URL is already resolved and request.user set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return throttle(request, request.resolver_match.url_name)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise with a one-year ``immutable`` lifetime for fingerprinted files
+    (WhiteNoise's default is ten years). Precompressed .br/.gz siblings written
+    by ``manage.py build_static`` are negotiated from Accept-Encoding.
+    """
+    FOREVER = 365 * 24 * 60 * 60
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Brotli or gzip for dynamic responses (API JSON, HTML).
+
+    - picks br over gzip when the client accepts both (q-values honoured)
+    - leaves responses under COMPRESSION_MIN_SIZE bytes alone
+    - skips media that is already compressed (images, video, archives, ...)
+    - responses that carry a CSRF token get gzip, never br: Django's gzip
+      adds a random-length header (BREACH mitigation), Brotli has no
+      equivalent
+    Static files never get here: StaticFilesMiddleware serves them first,
+    with their precompressed siblings.
+    """
+    incompressible_types = (
+        "image/", "video/", "audio/", "font/woff", "application/zip",
+        "application/gzip", "application/x-gzip", "application/octet-stream",
+        "application/pdf",
+    )
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        content_type = response.get("Content-Type", "").lower()
+        if content_type.startswith(self.incompressible_types) and not content_type.startswith("image/svg"):
+            return response
+
+        accepted = self.accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if (brotli is not None and accepted.get("br", accepted.get("*", 0)) > 0
+                and not self.carries_csrf_token(response)):
+            return self.brotli_response(response)
+        if accepted.get("gzip", accepted.get("*", 0)) > 0:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    @staticmethod
+    def carries_csrf_token(response):
+        # CsrfViewMiddleware (re)sets the cookie whenever get_token() was
+        # called for this response, i.e. whenever a token may be in the body.
+        return settings.CSRF_COOKIE_NAME in response.cookies
+
+    @staticmethod
+    def accepted_encodings(header):
+        accepted = {}
+        for part in header.split(","):
+            name, _, params = part.partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            q = 1.0
+            params = params.strip().replace(" ", "")
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name] = q
+        return accepted
+
+    def brotli_response(self, response):
+        patch_vary_headers(response, ("Accept-Encoding",))
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=quality)
+                    async for chunk in original_iterator:
+                        yield compressor.process(chunk) + compressor.flush()
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = self.brotli_sequence(response.streaming_content, quality)
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content, quality=quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+    @staticmethod
+    def brotli_sequence(sequence, quality):
+        compressor = brotli.Compressor(quality=quality)
+        for chunk in sequence:
+            # flush per chunk so streamed rows reach the client as they're produced
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
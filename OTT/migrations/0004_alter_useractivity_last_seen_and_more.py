@@ -0,0 +1,36 @@
+# Generated by Django 4.2.24 on 2026-10-19 06:32
+
+from django.db import migrations, models
+import django.db.models.functions.text
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OTT', '0003_alter_movie_thumbnail_url_alter_movie_video_url'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useractivity',
+            name='last_seen',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='ott_user_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='ott_user_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_blocked', True)), fields=['id'], name='ott_user_blocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_staff', True), ('is_superuser', True), ('is_admin', True), _connector='OR'), fields=['id'], name='ott_user_admin_idx'),
+        ),
+    ]
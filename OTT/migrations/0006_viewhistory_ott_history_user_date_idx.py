@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OTT', '0005_watchprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='viewhistory',
+            index=models.Index(fields=['user', '-date'], name='ott_history_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.24 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OTT', '0006_viewhistory_ott_history_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=64)),
+                ('sha256', models.CharField(max_length=64)),
+                ('reference', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mediaasset',
+            constraint=models.UniqueConstraint(fields=('kind', 'sha256'), name='ott_media_kind_sha256_uniq'),
+        ),
+    ]
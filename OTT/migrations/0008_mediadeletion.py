@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-19 06:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OTT', '0007_mediaasset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(choices=[('cloudinary', 'Cloudinary'), ('storage', 'Storage')], max_length=16)),
+                ('reference', models.CharField(max_length=255)),
+                ('enqueued_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mediadeletion',
+            constraint=models.UniqueConstraint(fields=('backend', 'reference'), name='ott_media_deletion_uniq'),
+        ),
+    ]
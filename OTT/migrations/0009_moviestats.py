@@ -0,0 +1,56 @@
+# Generated by Django 4.2.24 on 2026-10-19 06:56
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    Movie = apps.get_model("OTT", "Movie")
+    MovieStats = apps.get_model("OTT", "MovieStats")
+    ViewHistory = apps.get_model("OTT", "ViewHistory")
+    Watchlist = apps.get_model("OTT", "Watchlist")
+    db = schema_editor.connection.alias
+
+    movie_ids = list(Movie.objects.using(db).order_by("id").values_list("id", flat=True))
+    for start in range(0, len(movie_ids), 500):
+        ids = movie_ids[start:start + 500]
+        watchlisted = dict(
+            Watchlist.objects.using(db).filter(movie_id__in=ids)
+            .values("movie_id").annotate(n=Count("id")).order_by().values_list("movie_id", "n")
+        )
+        viewed = {
+            movie_id: (viewers, last)
+            for movie_id, viewers, last in ViewHistory.objects.using(db).filter(movie_id__in=ids)
+            .values("movie_id").annotate(viewers=Count("user_id", distinct=True), last=Max("date"))
+            .order_by().values_list("movie_id", "viewers", "last")
+        }
+        MovieStats.objects.using(db).bulk_create([
+            MovieStats(
+                movie_id=movie_id,
+                watchlist_count=watchlisted.get(movie_id, 0),
+                viewer_count=viewed.get(movie_id, (0, None))[0],
+                last_viewed_at=viewed.get(movie_id, (0, None))[1],
+            )
+            for movie_id in ids
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OTT', '0008_mediadeletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieStats',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='OTT.movie')),
+                ('watchlist_count', models.PositiveIntegerField(default=0)),
+                ('viewer_count', models.PositiveIntegerField(default=0)),
+                ('last_viewed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -2,16 +2,59 @@ from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from cloudinary.models import CloudinaryField
 
+from .versions import CATALOG, bump_on_commit, profile_tag
+
+
+
+# How recently a user must have been seen to count as online.
+ONLINE_WINDOW = timedelta(seconds=5)
+
+
+def prefix_range(expression, prefix):
+    """
+    ``expression`` starts with ``prefix``, written as a range so a plain
+    b-tree (or expression) index can serve it on every backend, unlike
+    LIKE/ILIKE which needs special operator classes on Postgres.
+    """
+    return {f"{expression}__gte": prefix, f"{expression}__lt": prefix + "\U0010ffff"}
+
+
+ADMIN_Q = Q(is_superuser=True) | Q(is_staff=True) | Q(is_admin=True)
+
+
+class UserQuerySet(models.QuerySet):
+    def search(self, prefix):
+        """Case-insensitive prefix match on email or username."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return self
+        return self.alias(email_lower=Lower("email"), username_lower=Lower("username")).filter(
+            Q(**prefix_range("email_lower", prefix)) | Q(**prefix_range("username_lower", prefix))
+        )
+
+    def admins(self):
+        return self.filter(ADMIN_Q)
+
+    def regular(self):
+        return self.exclude(ADMIN_Q)
+
+    def online(self):
+        return self.filter(activity__last_seen__gte=timezone.now() - ONLINE_WINDOW)
+
+    def blocked(self):
+        return self.filter(is_blocked=True)
 
 
 # -------------------------
 # Custom user manager
 # -------------------------
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, username=None):
         if not email:
             raise ValueError("Users must have an email address")
@@ -57,6 +100,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # prefix search in the admin user directory (UserQuerySet.search)
+            models.Index(Lower("email"), name="ott_user_email_lower_idx"),
+            models.Index(Lower("username"), name="ott_user_username_lower_idx"),
+            # role / blocked filters only ever select the small side
+            models.Index(fields=["id"], condition=Q(is_blocked=True), name="ott_user_blocked_idx"),
+            models.Index(
+                fields=["id"],
+                condition=Q(is_staff=True) | Q(is_superuser=True) | Q(is_admin=True),
+                name="ott_user_admin_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -78,18 +135,41 @@ class Movie(models.Model):
 
     # ✅ Stored in Cloudinary
     thumbnail_url = CloudinaryField("thumbnail", resource_type="image", blank=True, null=True)
-    video_url = CloudinaryField("video", resource_type="video", blank=True, null=True)
+    # Authenticated: only reachable through expiring signed URLs (OTT/signing.py).
+    video_url = CloudinaryField("video", resource_type="video", type="authenticated", blank=True, null=True)
 
     def __str__(self):
         return self.title
 
 
 
+class MovieStats(models.Model):
+    """
+    Engagement counters kept next to each movie, so lists read them with one
+    join instead of COUNT / MAX over Watchlist and ViewHistory per movie.
+    Maintained by OTT.stats (F() updates on watchlist / view events, plus
+    ``manage.py reconcile_movie_stats``).
+    """
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    watchlist_count = models.PositiveIntegerField(default=0)
+    viewer_count = models.PositiveIntegerField(default=0)  # distinct users with a ViewHistory row
+    last_viewed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"stats of movie {self.movie_id}"
+
+
 class ViewHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="view_histories")
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="view_histories")
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # "recently watched": WHERE user = ? ... ORDER BY date DESC
+            models.Index(fields=["user", "-date"], name="ott_history_user_date_idx"),
+        ]
+
 
 class Watchlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="watchlist_items")
@@ -99,16 +179,104 @@ class Watchlist(models.Model):
         unique_together = ("user", "movie")
 
 
+class WatchProgress(models.Model):
+    """
+    Latest playback position per (user, movie), for resume and the
+    "continue watching" rail. Written in batches by OTT.progress, never per
+    heartbeat.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="watch_progress")
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="watch_progress")
+    position = models.PositiveIntegerField(default=0)  # seconds
+    duration = models.PositiveIntegerField(null=True, blank=True)  # seconds
+    finished = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("user", "movie")
+        indexes = [
+            # continue watching: WHERE user = ? AND NOT finished ORDER BY updated_at DESC
+            models.Index(fields=["user", "finished", "-updated_at"], name="ott_progress_rail_idx"),
+        ]
+
+
+class MediaAsset(models.Model):
+    """
+    Stored media by content digest, per model field (``kind`` is e.g.
+    "OTT.movie.video_url"), so re-uploading the same bytes reuses the
+    stored asset. Written by OTT.uploads.
+    """
+    kind = models.CharField(max_length=64)
+    sha256 = models.CharField(max_length=64)
+    # What the field stores: Cloudinary "type/version/public_id", or a storage name.
+    reference = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "sha256"], name="ott_media_kind_sha256_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.sha256[:12]}"
+
+
+class MediaDeletion(models.Model):
+    """
+    Stored media that a row stopped referencing (replaced or deleted), queued
+    for deletion by ``manage.py gc_media`` (OTT/media_gc.py). Checked for
+    references again before anything is deleted.
+    """
+    CLOUDINARY = "cloudinary"  # CloudinaryField value ("video/upload/v1/<public id>.mp4")
+    STORAGE = "storage"        # file name in default_storage (ImageField)
+    BACKENDS = [(CLOUDINARY, "Cloudinary"), (STORAGE, "Storage")]
+
+    backend = models.CharField(max_length=16, choices=BACKENDS)
+    reference = models.CharField(max_length=255)
+    enqueued_at = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["backend", "reference"], name="ott_media_deletion_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.backend}: {self.reference}"
+
+
+class Counter(models.Model):
+    """Named counter, incremented with F() under a row lock (e.g. the title index version)."""
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class TitleChange(models.Model):
+    """
+    Change log of the title autocomplete index (OTT/suggest.py): the movie
+    touched by each version of the ``suggest`` counter.
+    """
+    version = models.BigIntegerField(primary_key=True)
+    movie_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.version}: movie {self.movie_id}"
+
+
 # -------------------------
 # Online / activity tracking
 # -------------------------
 class UserActivity(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="activity")
-    last_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now, db_index=True)
 
     @property
     def is_online(self):
-        return timezone.now() - self.last_seen < timedelta(seconds=5)
+        return timezone.now() - self.last_seen < ONLINE_WINDOW
 
     def __str__(self):
         return f"{self.user.email} - {'Online' if self.is_online() else 'Offline'}"
@@ -121,3 +289,18 @@ class UserActivity(models.Model):
 def create_user_activity(sender, instance, created, **kwargs):
     if created:
         UserActivity.objects.create(user=instance)
+
+
+# -------------------------
+# Signals: invalidate cached catalog / profile pages and payloads
+# -------------------------
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def bump_catalog_version(sender, instance, **kwargs):
+    bump_on_commit(CATALOG)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_profile_version(sender, instance, **kwargs):
+    bump_on_commit(profile_tag(instance.pk))
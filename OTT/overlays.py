@@ -0,0 +1,59 @@
+"""
+Per-user flags layered over the public (cacheable) movie payloads.
+
+The public rows are identical for everyone and come from the cache. For a
+signed-in user, ``add_overlays`` adds ``in_watchlist``, ``watched`` and
+``last_watched_at`` to each row. That takes at most two queries whatever
+the page size (watchlist membership into a set, latest view per movie into
+a dict), and only the ones the requested fields need. Up to OVERLAY_BATCH
+movies are looked up by id; a longer list (e.g. the unpaginated
+/api/movies/) reads the user's whole watchlist / history instead, indexed
+by user, and intersects in Python.
+"""
+from django.db.models import Max
+
+from .models import ViewHistory, Watchlist
+
+OVERLAY_FIELDS = ["in_watchlist", "watched", "last_watched_at"]
+# Largest IN (...) list; keeps it under the database's parameter limits.
+OVERLAY_BATCH = 500
+
+
+def movie_overlays(user, movie_ids, watchlist=True, history=True):
+    """``(watchlist set, {movie_id: last watched})`` for ``movie_ids``."""
+    watchlist_rows = Watchlist.objects.filter(user=user)
+    history_rows = ViewHistory.objects.filter(user=user)
+    if len(movie_ids) <= OVERLAY_BATCH:
+        watchlist_rows = watchlist_rows.filter(movie_id__in=movie_ids)
+        history_rows = history_rows.filter(movie_id__in=movie_ids)
+
+    wanted = set(movie_ids)
+    in_watchlist, last_watched = set(), {}
+    if watchlist:
+        in_watchlist = wanted.intersection(watchlist_rows.values_list("movie_id", flat=True))
+    if history:
+        last_watched = {
+            movie_id: last
+            for movie_id, last in history_rows.values("movie_id").annotate(last=Max("date")).order_by()
+            .values_list("movie_id", "last")
+            if movie_id in wanted
+        }
+    return in_watchlist, last_watched
+
+
+def add_overlays(rows, user, fields):
+    """
+    New rows with the requested overlay ``fields`` added; ``rows`` (possibly
+    a cached payload) aren't modified. Rows must carry "id".
+    """
+    in_watchlist, last_watched = movie_overlays(
+        user, [row["id"] for row in rows],
+        watchlist="in_watchlist" in fields, history="watched" in fields or "last_watched_at" in fields,
+    )
+    values = {
+        "in_watchlist": lambda movie_id: movie_id in in_watchlist,
+        "watched": lambda movie_id: movie_id in last_watched,
+        "last_watched_at": last_watched.get,
+    }
+    getters = [(name, values[name]) for name in fields]
+    return [{**row, **{name: get(row["id"]) for name, get in getters}} for row in rows]
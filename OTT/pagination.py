@@ -0,0 +1,75 @@
+"""
+Keyset (cursor) pagination for the admin pages.
+
+Pages are fetched with ``WHERE key < cursor ORDER BY key LIMIT n+1`` instead
+of OFFSET, so page 1000 costs the same index range scan as page 1 and rows
+inserted meanwhile don't shift pages. The key must be unique (id, email).
+"""
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(queryset, key, *, after=None, before=None, per_page=25, descending=False):
+    """
+    One page of ``queryset`` ordered by the unique field ``key``.
+
+    ``after`` / ``before`` are raw cursor values from the query string (the
+    ``next_cursor`` / ``prev_cursor`` of a previous page). Invalid cursors
+    fall back to the first page.
+    """
+    field = queryset.model._meta.get_field(key)
+    after = _parse(field, after)
+    before = _parse(field, before) if after is None else None
+
+    forward = f"-{key}" if descending else key
+    backward = key if descending else f"-{key}"
+    older, newer = ("lt", "gt") if descending else ("gt", "lt")
+
+    if before is not None:
+        rows = list(queryset.filter(**{f"{key}__{newer}": before}).order_by(backward)[:per_page + 1])
+        has_prev = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(**{f"{key}__{older}": after})
+        rows = list(queryset.order_by(forward)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = after is not None
+
+    if not rows:
+        return KeysetPage(rows)
+    return KeysetPage(
+        rows,
+        next_cursor=getattr(rows[-1], key) if has_next else None,
+        prev_cursor=getattr(rows[0], key) if has_prev else None,
+    )
+
+
+def _parse(field, value):
+    if value in (None, ""):
+        return None
+    try:
+        return field.to_python(value)
+    except Exception:
+        return None
@@ -0,0 +1,156 @@
+"""
+Coalesced playback-progress heartbeats.
+
+Players report their position every few seconds. Heartbeats are only kept
+in memory, one slot per (user, movie) so later ones overwrite earlier ones,
+and the buffer is flushed as a single bulk upsert into ``WatchProgress``
+every ``PROGRESS_FLUSH_SECONDS`` (or sooner when ``PROGRESS_MAX_PENDING``
+slots are waiting). A worker that dies hard loses at most one interval of
+positions, which for resume points is fine.
+
+Each process (gunicorn worker) has its own buffer; the flush thread is
+started lazily on first use, so it is created after fork. Buffers flush
+independently, so the upsert only overwrites a row with a newer heartbeat.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.utils import timezone
+
+from .models import Movie, User, WatchProgress
+
+logger = logging.getLogger(__name__)
+
+# Past this fraction of the duration a movie counts as watched and leaves
+# the continue-watching rail.
+FINISHED_RATIO = 0.95
+# Column order of the upsert: the (user, movie) key first, updated_at last.
+UPSERT_FIELDS = ["user", "movie", "position", "duration", "finished", "updated_at"]
+
+
+class ProgressBuffer:
+    def __init__(self, flush_seconds=None, max_pending=None):
+        self.flush_seconds = flush_seconds or settings.PROGRESS_FLUSH_SECONDS
+        self.max_pending = max_pending or settings.PROGRESS_MAX_PENDING
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._pid = None
+        self._wakeup = threading.Event()
+
+    # -------------------------
+    # Producers (request threads)
+    # -------------------------
+    def record(self, user_id, movie_id, position, duration=None):
+        self._ensure_thread()
+        with self._lock:
+            self._pending[(user_id, movie_id)] = (position, duration, timezone.now())
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def pending(self, user_id, movie_id):
+        """Unflushed heartbeat for this pair, as (position, duration, at) or None."""
+        with self._lock:
+            return self._pending.get((user_id, movie_id))
+
+    # -------------------------
+    # Flushing
+    # -------------------------
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if batch:
+                try:
+                    upsert(batch)
+                except Exception:
+                    logger.exception("dropping %d progress heartbeats", len(batch))
+            return len(batch)
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+            thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+            close_old_connections()
+
+
+def upsert(batch):
+    """
+    INSERT ... ON CONFLICT (user, movie) DO UPDATE for the whole batch,
+    applied only where the heartbeat is newer than the stored row: every
+    worker buffers on its own, so an older position flushed later must not
+    move resume backwards. Pairs whose user or movie was deleted meanwhile
+    are dropped first (checked on the primary) so one stale heartbeat can't
+    fail everyone's positions with a foreign key error.
+    """
+    connection = connections[router.db_for_write(WatchProgress)]
+    existing_users = set(
+        User.objects.using(connection.alias).filter(id__in={user_id for user_id, _ in batch})
+        .values_list("id", flat=True)
+    )
+    existing_movies = set(
+        Movie.objects.using(connection.alias).filter(id__in={movie_id for _, movie_id in batch})
+        .values_list("id", flat=True)
+    )
+
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [
+        (user_id, movie_id, position, duration,
+         bool(duration) and position >= duration * FINISHED_RATIO, adapt(at))
+        for (user_id, movie_id), (position, duration, at) in batch.items()
+        if user_id in existing_users and movie_id in existing_movies
+    ]
+    if not rows:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(WatchProgress._meta.db_table)
+    columns = [quote(WatchProgress._meta.get_field(name).column) for name in UPSERT_FIELDS]
+    user, movie, *updated, updated_at = columns
+    if connection.vendor == "mysql":
+        # Assignments run left to right: updated_at has to come last.
+        conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{column} = IF(VALUES({updated_at}) > {updated_at}, VALUES({column}), {column})"
+            for column in updated + [updated_at]
+        )
+    else:
+        conflict = (
+            f"ON CONFLICT ({user}, {movie}) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in updated + [updated_at])
+            + f" WHERE excluded.{updated_at} > {table}.{updated_at}"
+        )
+
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    max_params = connection.features.max_query_params
+    per_statement = max_params // len(columns) if max_params else len(rows)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+                f"{', '.join([placeholders] * len(chunk))} {conflict}",
+                [value for row in chunk for value in row],
+            )
+
+
+# One buffer per process.
+progress_buffer = ProgressBuffer()
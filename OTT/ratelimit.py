@@ -0,0 +1,158 @@
+"""
+Token-bucket rate limiting, shared by every worker process on the host.
+
+Limits are configured per URL name in ``settings.RATE_LIMITS``:
+
+    "api_login": {"ip": "10/m"}                     # per client IP
+    "api_movie_list": {"ip": "120/m", "user": "120/m"}  # and per signed-in user
+
+``"N/period"`` is a bucket of N tokens refilled at N per period (s, m, h).
+A request takes one token from each bucket that applies. If any bucket is
+empty, the answer is 429 with ``Retry-After``.
+
+Bucket state lives in a memory-mapped file (``/dev/shm`` when available).
+Every gunicorn worker maps the same table, so a client can't multiply its
+allowance by the number of workers, and checking costs no database or
+network round trip. The table is a fixed-size, 4-way set-associative
+array of (key fingerprint, tokens, timestamp) slots. A set is locked with
+an fcntl byte-range lock (across processes) plus a thread lock (within
+one). When a set is full, the least recently touched bucket is evicted;
+that client starts over with a full bucket.
+
+The table is per host. With several hosts, each one enforces the limits on
+its own share of the traffic.
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .renderers import ORJSONResponse
+
+SLOT = struct.Struct("<Qdd")  # fingerprint, tokens, last refill (monotonic)
+WAYS = 4
+PERIODS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_rate(rate):
+    """``"10/m"`` -> (capacity 10, refill 10/60 tokens per second)."""
+    count, _, period = rate.partition("/")
+    count = int(count)
+    return count, count / PERIODS[period.strip()[0].lower()]
+
+
+class SharedBuckets:
+    def __init__(self, path, slots):
+        self.sets = max(1, slots // WAYS)
+        self.size = self.sets * WAYS * SLOT.size
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # Opened lazily, after fork: fcntl locks belong to the process.
+        pid = os.getpid()
+        if self._pid != pid:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+            self._fd, self._map, self._pid = fd, mmap.mmap(fd, self.size), pid
+
+    def take(self, key, capacity, refill):
+        """Take one token from ``key``'s bucket: (allowed, seconds until next token)."""
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        fingerprint = int.from_bytes(digest, "little") or 1
+        offset = (fingerprint % self.sets) * WAYS * SLOT.size
+        now = time.monotonic()
+
+        with self._lock:
+            self._open()
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, WAYS * SLOT.size, offset)
+            try:
+                slots = [SLOT.unpack_from(self._map, offset + i * SLOT.size) for i in range(WAYS)]
+                way = next((i for i, slot in enumerate(slots) if slot[0] == fingerprint), None)
+                if way is None:
+                    # New bucket (or evicted): starts full, in the stalest slot.
+                    way = min(range(WAYS), key=lambda i: slots[i][2] if slots[i][0] else -1)
+                    tokens = capacity
+                else:
+                    _, tokens, last = slots[way]
+                    tokens = min(capacity, tokens + max(0.0, now - last) * refill)
+
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                SLOT.pack_into(self._map, offset + way * SLOT.size, fingerprint, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, WAYS * SLOT.size, offset)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill
+
+
+_buckets = None
+_limits = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        path = settings.RATE_LIMIT_TABLE or os.path.join(root, f"ott-ratelimit-v1-{os.getuid()}")
+        _buckets = SharedBuckets(path, settings.RATE_LIMIT_SLOTS)
+    return _buckets
+
+
+def limits_for(url_name):
+    global _limits
+    if _limits is None:
+        _limits = {
+            name: {scope: parse_rate(rate) for scope, rate in scopes.items()}
+            for name, scopes in settings.RATE_LIMITS.items()
+        }
+    return _limits.get(url_name)
+
+
+def client_ip(request):
+    """REMOTE_ADDR, or the address RATE_LIMIT_PROXY_COUNT proxies in from the right of X-Forwarded-For."""
+    hops = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if hops and forwarded:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[max(0, len(addresses) - hops)]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def throttle(request, url_name):
+    """None if the request may proceed, else the 429 response."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    limits = limits_for(url_name)
+    if not limits:
+        return None
+
+    keys = []
+    if "ip" in limits:
+        keys.append((f"{url_name}:ip:{client_ip(request)}", limits["ip"]))
+    user = getattr(request, "user", None)
+    if "user" in limits and user is not None and user.is_authenticated:
+        keys.append((f"{url_name}:user:{user.pk}", limits["user"]))
+
+    wait = 0.0
+    buckets = get_buckets()
+    for key, (capacity, refill) in keys:
+        allowed, retry_after = buckets.take(key, capacity, refill)
+        if not allowed:
+            wait = max(wait, retry_after)
+    if not wait:
+        return None
+
+    seconds = max(1, math.ceil(wait))
+    response = ORJSONResponse({"error": "Too many requests.", "retry_after": seconds}, status=429)
+    response["Retry-After"] = str(seconds)
+    return response
@@ -0,0 +1,55 @@
+"""
+orjson-backed JSON output for DRF views and plain Django views.
+
+orjson serialises dicts/lists/str/int/datetime/UUID natively in C; anything
+else (Decimal, lazy translation strings, querysets, ...) goes through DRF's
+encoder so output matches what the stdlib renderers produced. UTC datetimes
+end in "Z" (OPT_UTC_Z), as DRF's encoder writes them, not "+00:00".
+"""
+import orjson
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    return _fallback.default(obj)
+
+
+def dumps(data, indent=False):
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_default, option=option)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in for ``rest_framework.renderers.JSONRenderer``.
+    ``?indent`` style media type params get orjson's 2-space indent.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return dumps(data, indent=bool(indent))
+
+
+class ORJSONResponse(HttpResponse):
+    """
+    Drop-in for ``django.http.JsonResponse``.
+    Like it, refuses non-dict data unless ``safe=False``.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
@@ -1,5 +1,10 @@
+from django.db import models
 from rest_framework import serializers
-from .models import Movie, User
+
+from .overlays import OVERLAY_FIELDS
+from .signing import get_signer
+from .stats import STATS_FIELDS
+from .models import Movie, User, WatchProgress
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,22 +21,172 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class MovieListSerializer(serializers.ListSerializer):
+    """
+    Signs the playback URLs of the whole page in one batch before the
+    per-movie fields are rendered.
+    """
+
+    def to_representation(self, data):
+        movies = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.video_urls = get_signer().sign_movies(movies, self.context.get("request"))
+        return super().to_representation(movies)
+
+
+# =========================
+# Sparse fieldsets (?fields= / ?exclude=)
+# =========================
+# Output field -> model field it reads, for narrowing querysets with .only().
+MOVIE_FIELD_SOURCES = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "view_count": "view_count",
+    # MovieStats (OTT/stats.py), joined in by movie_queryset; opt-in (movie_fields).
+    "watchlist_count": "stats__watchlist_count",
+    "viewer_count": "stats__viewer_count",
+    "last_viewed_at": "stats__last_viewed_at",
+    "thumbnail": "thumbnail_url",
+    "video": "video_url",
+}
+
+
+def _field_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def movie_fields(request):
+    """
+    ``(fields, overlay fields)`` requested with ``?fields=a,b`` and/or
+    ``?exclude=c``, in the serializer's order. Overlay fields (OTT/overlays.py)
+    only apply to signed-in users. Engagement counters (OTT/stats.py) are
+    only sent when named in ``?fields=``. Unknown names are a 400.
+    """
+    fields = list(MOVIE_FIELD_SOURCES) + OVERLAY_FIELDS
+    requested = _field_list(request.query_params.get("fields", ""))
+    excluded = _field_list(request.query_params.get("exclude", ""))
+    unknown = sorted(set(requested + excluded) - set(fields))
+    if unknown:
+        raise serializers.ValidationError({"fields": [f"Unknown movie field(s): {', '.join(unknown)}."]})
+    if requested:
+        fields = [name for name in fields if name in requested]
+    else:
+        fields = [name for name in fields if name not in STATS_FIELDS]
+    fields = [name for name in fields if name not in excluded]
+    overlay = [name for name in fields if name in OVERLAY_FIELDS] if request.user.is_authenticated else []
+    return [name for name in fields if name in MOVIE_FIELD_SOURCES], overlay
+
+
+def movie_queryset(fields):
+    """Movies loading just what ``fields`` need; stats come from the same query (one join)."""
+    only = {"id"} | {MOVIE_FIELD_SOURCES[name] for name in fields}
+    queryset = Movie.objects.only(*only)
+    if any(source.startswith("stats__") for source in only):
+        queryset = queryset.select_related("stats")
+    return queryset
+
+
+def movie_stat(movie, name):
+    """``movie.stats.<name>``; zero / None when the movie has no stats row yet."""
+    stats = getattr(movie, "stats", None)
+    if stats is None:
+        return None if name == "last_viewed_at" else 0
+    return getattr(stats, name)
+
+
+def thumbnail_url(movie):
+    try:
+        return movie.thumbnail_url.url if movie.thumbnail_url else ""
+    except Exception:
+        return ""
+
+
 class MovieSerializer(serializers.ModelSerializer):
+    watchlist_count = serializers.SerializerMethodField()
+    viewer_count = serializers.SerializerMethodField()
+    last_viewed_at = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
     video = serializers.SerializerMethodField()
 
     class Meta:
         model = Movie
-        fields = ["id", "title", "description", "view_count", "thumbnail", "video"]
+        fields = [
+            "id", "title", "description", "view_count",
+            "watchlist_count", "viewer_count", "last_viewed_at", "thumbnail", "video",
+        ]
+        list_serializer_class = MovieListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_watchlist_count(self, obj):
+        return movie_stat(obj, "watchlist_count")
+
+    def get_viewer_count(self, obj):
+        return movie_stat(obj, "viewer_count")
+
+    def get_last_viewed_at(self, obj):
+        return movie_stat(obj, "last_viewed_at")
 
     def get_thumbnail(self, obj):
-        try:
-            return obj.thumbnail_url.url if obj.thumbnail_url else ""
-        except Exception:
-            return ""
+        return thumbnail_url(obj)
 
     def get_video(self, obj):
-        try:
-            return obj.video_url.url if obj.video_url else ""
-        except Exception:
-            return ""
+        # Expiring signed URL (OTT/signing.py), never the permanent asset URL.
+        video_urls = getattr(self, "video_urls", None)
+        if video_urls is None:
+            video_urls = get_signer().sign_movies([obj], self.context.get("request"))
+        return video_urls.get(obj.id, "")
+
+
+class MovieRowSerializer:
+    """
+    Read-only stand-in for ``MovieSerializer(many=True)`` on list endpoints.
+    Builds the same dicts straight from the instances: no field objects, no
+    per-row ``to_representation`` dispatch, and fields that weren't asked
+    for are never computed (no URL building, no signing).
+    """
+
+    def __init__(self, movies, fields=None, context=None):
+        self.movies = movies
+        self.fields = list(MOVIE_FIELD_SOURCES) if fields is None else list(fields)
+        self.context = context or {}
+
+    @property
+    def data(self):
+        movies = list(self.movies)
+        fields = self.fields
+        video_urls = {}
+        if "video" in fields:
+            video_urls = get_signer().sign_movies(movies, self.context.get("request"))
+
+        getters = {
+            "id": lambda movie: movie.id,
+            "title": lambda movie: movie.title,
+            "description": lambda movie: movie.description,
+            "view_count": lambda movie: movie.view_count,
+            "watchlist_count": lambda movie: movie_stat(movie, "watchlist_count"),
+            "viewer_count": lambda movie: movie_stat(movie, "viewer_count"),
+            "last_viewed_at": lambda movie: movie_stat(movie, "last_viewed_at"),
+            "thumbnail": thumbnail_url,
+            "video": lambda movie: video_urls.get(movie.id, ""),
+        }
+        row = [(name, getters[name]) for name in fields]
+        return [{name: get(movie) for name, get in row} for movie in movies]
+
+
+class ProgressHeartbeatSerializer(serializers.Serializer):
+    movie_id = serializers.IntegerField(min_value=1)
+    position = serializers.IntegerField(min_value=0)
+    duration = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+
+class WatchProgressSerializer(serializers.ModelSerializer):
+    movie = MovieSerializer(read_only=True)
+
+    class Meta:
+        model = WatchProgress
+        fields = ["movie", "position", "duration", "updated_at"]
@@ -0,0 +1,166 @@
+"""
+Expiring, HMAC-signed playback URLs.
+
+The API no longer hands out permanent Cloudinary video URLs. It returns
+``/api/play/<movie_id>/?exp=...&sig=...``. ``play_video`` checks the
+signature and hands the request to ``settings.PLAYBACK_BACKEND``, which
+either redirects to the real asset or, as a stand-in storage, serves it
+from disk. Videos are uploaded as ``authenticated`` Cloudinary assets, so
+there is no public delivery URL to leak: the redirect goes to a signed CDN
+delivery URL for the asset. With CLOUDINARY_AUTH_TOKEN_KEY set (token-based
+access on the Cloudinary account), that URL carries a token expiring with
+the playback link; otherwise it is signed but doesn't expire.
+``manage.py protect_videos`` converts videos uploaded before that.
+
+Expiry times are rounded to TTL buckets. Every URL minted within one bucket
+shares the same ``exp`` (valid for TTL..2*TTL seconds), so a movie's
+signature is computed once per bucket and then reused from memory.
+Serializing a page of 100 movies costs at most 100 HMACs per bucket, and no
+per-movie Cloudinary SDK URL building.
+"""
+import base64
+import hashlib
+import hmac
+import mimetypes
+import threading
+import time
+from pathlib import Path
+
+from cloudinary.utils import cloudinary_url
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+
+class PlaybackSigner:
+    def __init__(self, key=None, ttl=None):
+        key = key or settings.PLAYBACK_SIGNING_KEY
+        self.ttl = ttl or settings.PLAYBACK_URL_TTL
+        # Derived key: a leaked playback signature says nothing about SECRET_KEY.
+        self._mac = hmac.new(hashlib.sha256(b"ott.playback:" + key.encode()).digest(), digestmod=hashlib.sha256)
+        self._lock = threading.Lock()
+        self._expires = None
+        self._cache = {}
+
+    def expiry(self, now=None):
+        now = time.time() if now is None else now
+        return (int(now) // self.ttl + 2) * self.ttl
+
+    def signature(self, resource, expires):
+        mac = self._mac.copy()
+        mac.update(f"{resource}:{expires}".encode())
+        return base64.urlsafe_b64encode(mac.digest()[:18]).decode()
+
+    def verify(self, resource, expires, signature, now=None):
+        now = time.time() if now is None else now
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if expires <= now or expires > now + 2 * self.ttl:
+            return False
+        return hmac.compare_digest(self.signature(resource, expires), signature or "")
+
+    def sign_movies(self, movies, request=None):
+        """
+        ``{movie.id: signed url}`` for a batch of movies (movies without a
+        video are left out). Signatures are memoised for the current bucket.
+        """
+        expires = self.expiry()
+        with self._lock:
+            if expires != self._expires:
+                # New bucket: everything cached belongs to the old expiry.
+                self._expires, self._cache = expires, {}
+            cache = self._cache
+
+        urls = {}
+        for movie in movies:
+            resource = video_resource(movie)
+            if not resource:
+                continue
+            key = (movie.id, resource)
+            sig = cache.get(key)
+            if sig is None:
+                sig = cache[key] = self.signature(resource, expires)
+            url = f"{reverse('play_video', args=[movie.id])}?exp={expires}&sig={sig}"
+            urls[movie.id] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
+def video_resource(movie):
+    """
+    What a playback URL is signed for: the stored Cloudinary reference
+    (type/version/public id), so a re-uploaded video invalidates old links.
+    """
+    video = movie.video_url
+    if not video:
+        return ""
+    get_prep_value = getattr(video, "get_prep_value", None)
+    return (get_prep_value() if get_prep_value else str(video)) or ""
+
+
+# =========================
+# Playback backends (settings.PLAYBACK_BACKEND)
+# =========================
+class CloudinaryRedirectBackend:
+    """
+    Production: 302 to the signed CDN delivery URL of the authenticated
+    asset, with an auth token expiring with the playback link when
+    PLAYBACK_CLOUDINARY_TOKEN_KEY is configured.
+    """
+
+    def respond(self, request, movie, expires):
+        video = movie.video_url
+        options = {
+            "resource_type": video.resource_type or "video",
+            "type": video.type or "authenticated",
+            "version": video.version,
+            "format": video.format,
+            "secure": True,
+            "sign_url": True,
+        }
+        if settings.PLAYBACK_CLOUDINARY_TOKEN_KEY:
+            options["auth_token"] = {"key": settings.PLAYBACK_CLOUDINARY_TOKEN_KEY, "expiration": expires}
+        url, _ = cloudinary_url(video.public_id, **options)
+        response = HttpResponseRedirect(url)
+        response["Cache-Control"] = f"private, max-age={max(0, int(expires - time.time()))}"
+        return response
+
+
+class LocalFileBackend:
+    """
+    Stand-in storage for development and tests: serves
+    ``PLAYBACK_LOCAL_ROOT/<public_id>.<format>`` directly, so signature
+    enforcement can be exercised without Cloudinary.
+    """
+
+    def respond(self, request, movie, expires):
+        video = movie.video_url
+        name = str(video)
+        fmt = getattr(video, "format", None)
+        if fmt:
+            name = f"{name}.{fmt}"
+        root = Path(settings.PLAYBACK_LOCAL_ROOT).resolve()
+        path = (root / name).resolve()
+        if root not in path.parents or not path.is_file():
+            raise Http404("Video file not found.")
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        return FileResponse(path.open("rb"), content_type=content_type)
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def get_signer():
+    global _signer
+    if _signer is None:
+        with _signer_lock:
+            if _signer is None:
+                _signer = PlaybackSigner()
+    return _signer
+
+
+def get_backend():
+    return import_string(settings.PLAYBACK_BACKEND)()
@@ -0,0 +1,153 @@
+"""
+Per-movie engagement counters (``MovieStats``).
+
+Each counter is kept current with a single atomic ``UPDATE ... SET
+n = n + 1`` (F()) from signal receivers, run once the triggering
+transaction commits (a rolled-back insert never counts), so there is no
+read-modify-write and no lock held across requests:
+
+    * Watchlist added / removed: watchlist_count +1 / -1.
+    * ViewHistory added: viewer_count +1 when it is the user's first view
+      of the movie (one indexed EXISTS); last_viewed_at moved forward.
+    * Movie created: its zeroed stats row.
+
+Writes that send no signals (bulk_create, raw SQL such as
+``manage.py generate_dataset``, view history cascaded away with a user),
+and two first views of the same movie by one user racing each other, make
+the counters drift. ``manage.py reconcile_movie_stats`` recomputes them
+from the source tables in batches of movies and fixes whatever differs.
+
+Counters are opt-in on /api/movies/ (``?fields=id,watchlist_count``) and
+their changes bump no version tag, so views and watchlist changes never
+rebuild the catalog payload. Cached payloads showing them expire instead:
+/api/movies/ after STATS_CACHE_TIMEOUT (OTT/views.py), the admin movie
+list with its template fragment.
+"""
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Movie, MovieStats, ViewHistory, Watchlist
+
+# Movies per reconcile batch; keeps the IN (...) lists under parameter limits.
+RECONCILE_BATCH = 500
+STATS_FIELDS = ["watchlist_count", "viewer_count", "last_viewed_at"]
+
+
+def _bump(movie_id, **changes):
+    if not MovieStats.objects.filter(movie_id=movie_id).update(**changes):
+        # No stats row yet (movie inserted without signals): build it.
+        refresh([movie_id])
+
+
+# -------------------------
+# Signal receivers (connected in OttConfig.ready)
+# -------------------------
+def movie_saved(sender, instance, created, **kwargs):
+    if created:
+        MovieStats.objects.get_or_create(movie_id=instance.pk)
+
+
+def watchlist_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        movie_id = instance.movie_id
+        transaction.on_commit(lambda: _bump(movie_id, watchlist_count=F("watchlist_count") + 1))
+
+
+def watchlist_deleted(sender, instance, **kwargs):
+    movie_id = instance.movie_id
+
+    def apply():
+        # Update only: when the movie itself was deleted its stats row is
+        # gone, and must not be recreated.
+        MovieStats.objects.filter(movie_id=movie_id, watchlist_count__gt=0).update(
+            watchlist_count=F("watchlist_count") - 1,
+        )
+
+    transaction.on_commit(apply)
+
+
+def view_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    pk, user_id, movie_id = instance.pk, instance.user_id, instance.movie_id
+    date = Value(instance.date, output_field=DateTimeField())
+
+    def apply():
+        changes = {"last_viewed_at": Greatest(Coalesce("last_viewed_at", date), date)}
+        # Earlier rows only: views committed together each see the others.
+        seen_before = ViewHistory.objects.filter(user_id=user_id, movie_id=movie_id, pk__lt=pk).exists()
+        if not seen_before:
+            changes["viewer_count"] = F("viewer_count") + 1
+        _bump(movie_id, **changes)
+
+    transaction.on_commit(apply)
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+def compute(movie_ids):
+    """``{movie_id: (watchlist_count, viewer_count, last_viewed_at)}`` from the source tables."""
+    watchlisted = dict(
+        Watchlist.objects.filter(movie_id__in=movie_ids)
+        .values("movie_id")
+        .annotate(n=Count("id"))
+        .order_by()
+        .values_list("movie_id", "n")
+    )
+    viewed = {
+        movie_id: (viewers, last)
+        for movie_id, viewers, last in ViewHistory.objects.filter(movie_id__in=movie_ids)
+        .values("movie_id")
+        .annotate(viewers=Count("user_id", distinct=True), last=Max("date"))
+        .order_by()
+        .values_list("movie_id", "viewers", "last")
+    }
+    return {
+        movie_id: (watchlisted.get(movie_id, 0), *viewed.get(movie_id, (0, None)))
+        for movie_id in movie_ids
+    }
+
+
+def refresh(movie_ids):
+    """
+    Recompute the stats of ``movie_ids``; returns how many rows were created
+    or corrected. The stats rows are locked first, so a concurrent F()
+    update either lands before the recount (and is counted) or waits and
+    applies on top of it.
+    """
+    with transaction.atomic():
+        stored = {stats.movie_id: stats for stats in MovieStats.objects.select_for_update().filter(movie_id__in=movie_ids)}
+        existing = set(Movie.objects.filter(id__in=movie_ids).values_list("id", flat=True))
+        actual = compute([movie_id for movie_id in movie_ids if movie_id in existing])
+
+        missing, changed = [], []
+        for movie_id, values in actual.items():
+            stats = stored.get(movie_id)
+            if stats is None:
+                missing.append(MovieStats(movie_id=movie_id, **dict(zip(STATS_FIELDS, values))))
+            elif tuple(getattr(stats, name) for name in STATS_FIELDS) != values:
+                for name, value in zip(STATS_FIELDS, values):
+                    setattr(stats, name, value)
+                changed.append(stats)
+        MovieStats.objects.bulk_create(missing, ignore_conflicts=True)
+        MovieStats.objects.bulk_update(changed, STATS_FIELDS)
+    return len(missing) + len(changed)
+
+
+def reconcile(batch_size=RECONCILE_BATCH, log=None):
+    """Refresh every movie's stats, ``batch_size`` movies at a time; returns (checked, fixed)."""
+    checked = fixed = 0
+    after = 0
+    while True:
+        ids = list(Movie.objects.filter(id__gt=after).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        count = refresh(ids)
+        checked += len(ids)
+        fixed += count
+        after = ids[-1]
+        if log:
+            log(checked, fixed)
+    return checked, fixed
@@ -0,0 +1,238 @@
+"""
+Title autocomplete served from memory.
+
+Each worker keeps a sorted array of normalized title keys (casefolded,
+accents stripped). Every word start is a key, so "dar" finds "The Dark
+Knight". A lookup is a bisect plus a short scan, with no database and no
+cache round trip. Prefixes matching more than SCAN_LIMIT keys (one or two
+letters, "the") are ranked over all their matches once and their top
+TOP_N kept until a change touches them, so they come back by popularity,
+not by whichever titles sort first.
+
+Keeping workers in sync:
+
+    * Movie post_save / post_delete, once the transaction commits, update
+      this worker's index directly and append the movie id to a change log
+      in the database (``TitleChange``), under the next value of the
+      ``suggest`` counter. Counter and log entry are written in one
+      transaction with the counter row locked, so versions are contiguous
+      and a version is never visible before its change.
+    * At most every SYNC_SECONDS a lookup compares the counter with the
+      version this worker has applied. It reloads just the changed movies
+      (one query), or rebuilds from scratch when the log no longer reaches
+      back that far. All of this reads the primary: a lagging replica would
+      hand back the movie as it was before the change.
+    * A full rebuild also runs every REBUILD_SECONDS, so ranking follows
+      ``view_count``, which is updated with F() and sends no signals.
+"""
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+
+from django.db import transaction
+from django.db.models import F
+
+from django_back.routers import PRIMARY
+
+from .models import Counter, Movie, TitleChange
+
+COUNTER = "suggest"
+# Catch-ups needing more changes than this rebuild instead; older log
+# entries are pruned.
+MAX_CATCH_UP = 500
+SYNC_SECONDS = 1.0
+REBUILD_SECONDS = 600
+# Prefixes matching more keys than this get their ranking memoised.
+SCAN_LIMIT = 500
+# Memoised results per prefix; larger limits rank from scratch.
+TOP_N = 20
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").casefold()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.split())
+
+
+def title_keys(title):
+    """``"the dark knight"`` -> the dark knight / dark knight / knight."""
+    words = normalize(title).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class TitleIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []      # sorted (key, movie_id)
+        self._movies = {}    # movie_id -> (title, view_count, normalized title)
+        self._top = {}       # busy prefix -> top TOP_N movie ids
+        self.version = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def suggest(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self._sync()
+        with self._lock:
+            ranked = self._top.get(prefix) if limit <= TOP_N else None
+            if ranked is None:
+                ranked = self._rank(prefix, max(limit, TOP_N))
+            movies = self._movies
+            return [{"id": movie_id, "title": movies[movie_id][0]} for movie_id in ranked[:limit]]
+
+    def _rank(self, prefix, limit):
+        keys, movies = self._keys, self._movies
+        start = bisect.bisect_left(keys, (prefix,))
+        end = bisect.bisect_left(keys, (prefix + "\U0010ffff",), start)
+        # movie_id -> matched at the start of the title?
+        matches = {}
+        for index in range(start, end):
+            key, movie_id = keys[index]
+            matches[movie_id] = matches.get(movie_id, False) or key == movies[movie_id][2]
+        ranked = [
+            movie_id for movie_id, _ in heapq.nlargest(
+                limit, matches.items(),
+                key=lambda item: (item[1], movies[item[0]][1], -len(movies[item[0]][0])),
+            )
+        ]
+        if end - start > SCAN_LIMIT and limit == TOP_N:
+            self._top[prefix] = ranked
+        return ranked
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def put(self, movie_id, title, view_count):
+        with self._lock:
+            self._remove(movie_id)
+            self._movies[movie_id] = (title, view_count or 0, normalize(title))
+            for key in title_keys(title):
+                bisect.insort(self._keys, (key, movie_id))
+                self._forget(key)
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._remove(movie_id)
+
+    def _remove(self, movie_id):
+        old = self._movies.pop(movie_id, None)
+        if old is None:
+            return
+        for key in title_keys(old[0]):
+            index = bisect.bisect_left(self._keys, (key, movie_id))
+            if index < len(self._keys) and self._keys[index] == (key, movie_id):
+                del self._keys[index]
+            self._forget(key)
+
+    def _forget(self, key):
+        """Drop the memoised rankings ``key`` takes part in."""
+        if self._top:
+            for end in range(1, len(key) + 1):
+                self._top.pop(key[:end], None)
+
+    def rebuild(self):
+        version = current_version()
+        rows = list(Movie.objects.using(PRIMARY).values_list("id", "title", "view_count"))
+        keys = sorted((key, movie_id) for movie_id, title, _ in rows for key in title_keys(title))
+        movies = {movie_id: (title, view_count or 0, normalize(title)) for movie_id, title, view_count in rows}
+        with self._lock:
+            self._keys, self._movies, self._top = keys, movies, {}
+            self.version = version
+            self._built_at = time.monotonic()
+
+    # -------------------------
+    # Cross-worker sync
+    # -------------------------
+    def _sync(self):
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < SYNC_SECONDS:
+            return
+        self._checked_at = now
+        version = current_version()
+        if (self.version is None or now - self._built_at > REBUILD_SECONDS
+                or version < self.version or version - self.version > MAX_CATCH_UP):
+            self.rebuild()
+        elif version > self.version:
+            self._catch_up(self.version, version)
+
+    def _catch_up(self, applied, version):
+        changes = list(
+            TitleChange.objects.using(PRIMARY)
+            .filter(version__gt=applied, version__lte=version)
+            .values_list("movie_id", flat=True)
+        )
+        if len(changes) != version - applied:
+            # Pruned, or skipped by invalidate().
+            self.rebuild()
+            return
+        changed = set(changes)
+        found = {
+            movie_id: (title, view_count)
+            for movie_id, title, view_count in Movie.objects.using(PRIMARY)
+            .filter(id__in=changed).values_list("id", "title", "view_count")
+        }
+        for movie_id in changed:
+            if movie_id in found:
+                self.put(movie_id, *found[movie_id])
+            else:
+                self.remove(movie_id)
+        self.version = version
+
+
+def current_version():
+    return Counter.objects.using(PRIMARY).filter(name=COUNTER).values_list("value", flat=True).first() or 0
+
+
+def _advance(delta):
+    """Add ``delta`` to the counter; returns the new value. Call inside an atomic block."""
+    Counter.objects.using(PRIMARY).get_or_create(name=COUNTER)
+    Counter.objects.using(PRIMARY).filter(name=COUNTER).update(value=F("value") + delta)
+    return Counter.objects.using(PRIMARY).values_list("value", flat=True).get(name=COUNTER)
+
+
+def log_change(movie_id):
+    with transaction.atomic(using=PRIMARY):
+        version = _advance(1)
+        TitleChange.objects.using(PRIMARY).create(version=version, movie_id=movie_id)
+        TitleChange.objects.using(PRIMARY).filter(version__lte=version - MAX_CATCH_UP).delete()
+
+
+def invalidate():
+    """Make every worker rebuild on its next sync (after bulk loads, which send no signals)."""
+    with transaction.atomic(using=PRIMARY):
+        _advance(MAX_CATCH_UP + 1)
+
+
+# One index per process.
+title_index = TitleIndex()
+
+
+# -------------------------
+# Signal receivers (connected in OttConfig.ready)
+# -------------------------
+def movie_saved(sender, instance, **kwargs):
+    # On commit: a rolled-back save must reach no index.
+    pk, title, view_count = instance.pk, instance.title, instance.view_count
+
+    def apply():
+        title_index.put(pk, title, view_count)
+        log_change(pk)
+
+    transaction.on_commit(apply)
+
+
+def movie_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def apply():
+        title_index.remove(pk)
+        log_change(pk)
+
+    transaction.on_commit(apply)
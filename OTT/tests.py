@@ -1,3 +1,920 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import uuid
+import zoneinfo
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import ResolverMatch, resolve
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from django_back import routers
+from OTT import media_gc, ratelimit
+from OTT.exports import export_stream
+from OTT.media_gc import drain
+from OTT.middleware import CompressionMiddleware, PrimaryPinningMiddleware
+from OTT.models import MediaAsset, MediaDeletion, Movie, MovieStats, User, ViewHistory, Watchlist, WatchProgress
+from OTT.overlays import add_overlays
+from OTT.pagination import keyset_paginate
+from OTT.progress import progress_buffer, upsert
+from OTT.renderers import dumps
+from OTT.signing import CloudinaryRedirectBackend, get_signer, video_resource
+from OTT.stats import reconcile
+from OTT.suggest import TitleIndex, invalidate
+from OTT.versions import bump_version, get_version
+
+# Same tiers as production, with the shared tier in memory so tests neither
+# see nor leave entries in the developer's CACHE_DIR.
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "OTT.cache.TieredCache",
+        "TIMEOUT": 300,
+        "OPTIONS": {"SHARED": "shared", "LOCAL_TIMEOUT": 5},
+    },
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ott-tests"},
+}
+
+
+# Base for tests that go through the cache or the rate-limited views: an
+# isolated tiered cache (OTT/cache.py) and no throttling (OTT/ratelimit.py).
+@override_settings(CACHES=TEST_CACHES, RATE_LIMIT_ENABLED=False)
+class OTTTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+
+# =========================
+# Primary / replica routing (django_back/routers.py)
+# =========================
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class RouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.tokens = routers.reset_pinning()
+
+    def tearDown(self):
+        routers.restore_pinning(self.tokens)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Movie), "replica1")
+
+    def test_write_pins_the_rest_of_the_request(self):
+        self.assertEqual(self.router.db_for_write(Movie), "default")
+        self.assertTrue(routers.wrote_to_primary())
+        self.assertEqual(self.router.db_for_read(Movie), "default")
+
+    def test_other_apps_are_not_routed(self):
+        from django.contrib.sessions.models import Session
+
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Movie), "default")
+
+    def test_writes_outside_a_request_scope_pin_nothing(self):
+        # A new thread starts with no scope, like the progress flush thread.
+        seen = []
+
+        def work():
+            self.router.db_for_write(Movie)
+            seen.extend([routers.is_pinned(), routers.wrote_to_primary(), self.router.db_for_read(Movie)])
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [False, False, "replica1"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_PIN_SECONDS=5)
+class PrimaryPinningMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def run_view(self, view, **cookies):
+        request = self.factory.get("/")
+        request.COOKIES.update(cookies)
+        return PrimaryPinningMiddleware(view)(request)
+
+    def test_write_sets_pin_cookie(self):
+        def view(request):
+            self.router.db_for_write(Movie)
+            return HttpResponse()
+
+        response = self.run_view(view)
+        self.assertIn("db_pin", response.cookies)
+        self.assertEqual(response.cookies["db_pin"]["max-age"], 5)
+
+    def read_view(self, request):
+        return HttpResponse(self.router.db_for_read(Movie))
+
+    def test_read_only_request_sets_no_cookie(self):
+        response = self.run_view(self.read_view)
+        self.assertEqual(response.content, b"replica1")
+        self.assertNotIn("db_pin", response.cookies)
+
+    def test_fresh_pin_cookie_reads_from_primary(self):
+        response = self.run_view(self.read_view, db_pin=str(int(time.time()) + 5))
+        self.assertEqual(response.content, b"default")
+
+    def test_expired_or_garbage_pin_cookie_is_ignored(self):
+        self.assertEqual(self.run_view(self.read_view, db_pin=str(int(time.time()) - 1)).content, b"replica1")
+        self.assertEqual(self.run_view(self.read_view, db_pin="x").content, b"replica1")
+
+    def test_pin_does_not_leak_into_the_next_request(self):
+        def view(request):
+            self.router.db_for_write(Movie)
+            return HttpResponse()
+
+        self.run_view(view)
+        self.assertFalse(routers.is_pinned())
+
+
+# =========================
+# Keyset pagination (OTT/pagination.py)
+# =========================
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [Movie.objects.create(title=f"Movie {n}").id for n in range(5)]
+
+    def page(self, **kwargs):
+        return keyset_paginate(Movie.objects.all(), "id", per_page=2, descending=True, **kwargs)
+
+    def test_walks_forward_and_back(self):
+        newest_first = self.ids[::-1]
+        first = self.page()
+        self.assertEqual([m.id for m in first], newest_first[:2])
+        self.assertFalse(first.has_previous)
+
+        second = self.page(after=str(first.next_cursor))
+        self.assertEqual([m.id for m in second], newest_first[2:4])
+        self.assertTrue(second.has_previous)
+
+        last = self.page(after=str(second.next_cursor))
+        self.assertEqual([m.id for m in last], newest_first[4:])
+        self.assertFalse(last.has_next)
+
+        back = self.page(before=str(last.prev_cursor))
+        self.assertEqual([m.id for m in back], newest_first[2:4])
+        self.assertTrue(back.has_next)
+
+    def test_rows_inserted_meanwhile_dont_shift_pages(self):
+        first = self.page()
+        Movie.objects.create(title="New")
+        second = self.page(after=str(first.next_cursor))
+        self.assertEqual([m.id for m in second], self.ids[::-1][2:4])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        self.assertEqual([m.id for m in self.page(after="nope")], self.ids[::-1][:2])
+
+    def test_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            list(self.page(after=str(self.ids[3])))
+
+
+# =========================
+# Bulk user import (manage.py import_users)
+# =========================
+class ImportUsersTests(TestCase):
+    def import_csv(self, text):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as csv_file:
+            csv_file.write(text)
+            csv_file.flush()
+            call_command("import_users", csv_file.name, workers=1, stdout=io.StringIO())
+
+    def test_existing_emails_match_case_insensitively(self):
+        User.objects.create_user(email="foo@x.com")
+        self.import_csv("email,username,password\nFoo@x.com,foo,\nbar@x.com,bar,\nBAR@x.com,bar2,\n")
+        self.assertEqual(
+            sorted(User.objects.values_list("email", flat=True)), ["bar@x.com", "foo@x.com"],
+        )
+        self.assertTrue(User.objects.get(email="bar@x.com").activity)
+
+
+# =========================
+# Synthetic dataset (manage.py generate_dataset)
+# =========================
+class GenerateDatasetTests(OTTTestCase):
+    def load(self):
+        call_command(
+            "generate_dataset", users=5, movies=3, views=40, watchlist=1, keep_indexes=True, stdout=io.StringIO(),
+        )
+        return list(ViewHistory.objects.order_by("id").values_list("user__email", "movie__title", "date"))
+
+    def test_same_seed_loads_the_same_rows_on_any_day(self):
+        first = self.load()
+        self.assertLess(max(date for _, _, date in first).date().isoformat(), "2025-01-01")
+        User.objects.all().delete()
+        Movie.objects.all().delete()
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(days=3)):
+            self.assertEqual(self.load(), first)
+
+
+# =========================
+# JSON rendering (OTT/renderers.py)
+# =========================
+class RendererTests(SimpleTestCase):
+    def test_output_matches_drfs_encoder(self):
+        payload = {
+            "utc": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            "zone_utc": datetime(2026, 1, 2, 3, 4, 5, tzinfo=zoneinfo.ZoneInfo("UTC")),
+            "kolkata": datetime(2026, 1, 2, 3, 4, 5, 1, tzinfo=zoneinfo.ZoneInfo("Asia/Kolkata")),
+            "naive": datetime(2026, 1, 2, 3, 4, 5),
+            "date": date(2026, 1, 2),
+            "id": uuid.UUID(int=1),
+            "price": Decimal("9.5"),
+            "title": "Amélie",
+            "rows": [1, 2.5, None, True],
+        }
+        expected = json.dumps(payload, cls=JSONEncoder, separators=(",", ":"), ensure_ascii=False).encode()
+        self.assertEqual(dumps(payload), expected)
+
+
+# =========================
+# Response compression (OTT.middleware.CompressionMiddleware)
+# =========================
+@override_settings(COMPRESSION_MIN_SIZE=10)
+class CompressionMiddlewareTests(OTTTestCase):
+    def get(self, path):
+        return self.client.get(path, HTTP_ACCEPT_ENCODING="gzip, br")
+
+    def test_brotli_preferred(self):
+        response = CompressionMiddleware(lambda request: HttpResponse("x" * 2000))(
+            RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_pages_with_a_csrf_token_get_padded_gzip(self):
+        # login.html renders {% csrf_token %}.
+        responses = [self.get("/login/") for _ in range(6)]
+        self.assertEqual({response["Content-Encoding"] for response in responses}, {"gzip"})
+        # Random-length gzip header: the same page differs in size.
+        self.assertGreater(len({len(response.content) for response in responses}), 1)
+
+    def test_pages_without_a_token_keep_brotli(self):
+        Movie.objects.create(title="Movie", description="x" * 100)
+        self.assertEqual(self.get("/api/movies/")["Content-Encoding"], "br")
+
+
+# =========================
+# Playback progress (OTT/progress.py)
+# =========================
+class ProgressTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email="viewer@x.com", password="pw")
+        self.movie = Movie.objects.create(title="Movie")
+        self.client.force_login(self.user)
+
+    def stored(self):
+        progress = WatchProgress.objects.get(user=self.user, movie=self.movie)
+        return progress.position, progress.duration, progress.finished
+
+    def test_upsert_inserts_then_updates(self):
+        now = timezone.now()
+        upsert({(self.user.id, self.movie.id): (10, 100, now)})
+        self.assertEqual(self.stored(), (10, 100, False))
+        upsert({(self.user.id, self.movie.id): (99, 100, now + timedelta(seconds=5))})
+        self.assertEqual(self.stored(), (99, 100, True))
+
+    def test_older_heartbeat_flushed_later_is_ignored(self):
+        now = timezone.now()
+        upsert({(self.user.id, self.movie.id): (60, 100, now)})
+        # Another worker's buffer, holding an earlier position, flushes after.
+        upsert({(self.user.id, self.movie.id): (20, 100, now - timedelta(seconds=10))})
+        self.assertEqual(self.stored(), (60, 100, False))
+
+    def test_heartbeats_for_deleted_movies_are_dropped(self):
+        now = timezone.now()
+        upsert({(self.user.id, 999999): (5, None, now), (self.user.id, self.movie.id): (5, None, now)})
+        self.assertEqual(WatchProgress.objects.count(), 1)
+
+    def test_heartbeats_of_users_deleted_before_the_flush_are_dropped(self):
+        leaving = User.objects.create_user(email="leaving@x.com")
+        progress_buffer.record(leaving.id, self.movie.id, 30, 100)
+        progress_buffer.record(self.user.id, self.movie.id, 40, 100)
+        leaving.delete()
+        progress_buffer.flush()
+        # Foreign keys are deferred to a commit a TestCase never reaches.
+        connection.check_constraints()
+        self.assertEqual(self.stored(), (40, 100, False))
+        self.assertEqual(WatchProgress.objects.count(), 1)
+
+    def test_heartbeat_then_resume(self):
+        response = self.client.post(
+            "/api/progress/", {"movie_id": self.movie.id, "position": 42, "duration": 100},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(f"/api/progress/{self.movie.id}/").json()["position"], 42)
+        progress_buffer.flush()
+        self.assertEqual(self.stored(), (42, 100, False))
+
+    def test_wrong_method_per_route_is_405(self):
+        self.assertEqual(self.client.get("/api/progress/").status_code, 405)
+        self.assertEqual(self.client.post(f"/api/progress/{self.movie.id}/", {}).status_code, 405)
+        batch = self.client.get("/api/batch/", {"path": ["/api/progress/", f"/api/progress/{self.movie.id}/"]})
+        self.assertEqual([result["status"] for result in batch.json()["responses"]], [405, 200])
+
+
+# =========================
+# Signed playback URLs (OTT/signing.py)
+# =========================
+class PlaybackTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        Path(root.name, "clip.mp4").write_bytes(b"video bytes")
+        override = override_settings(PLAYBACK_BACKEND="OTT.signing.LocalFileBackend", PLAYBACK_LOCAL_ROOT=root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.movie = Movie.objects.create(title="Movie", video_url="video/authenticated/v1/clip.mp4")
+        self.url = get_signer().sign_movies([self.movie])[self.movie.id]
+
+    def test_valid_link_plays(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"video bytes")
+
+    def test_tampered_link_is_rejected(self):
+        self.assertEqual(self.client.get(self.url[:-2] + "xx").status_code, 403)
+        # A valid signature for another movie doesn't carry over.
+        other = Movie.objects.create(title="Other", video_url="video/authenticated/v1/other.mp4")
+        self.assertEqual(self.client.get(self.url.replace(str(self.movie.id), str(other.id), 1)).status_code, 403)
+
+    def test_expired_link_is_rejected(self):
+        expires = int(time.time()) - 1
+        signature = get_signer().signature(video_resource(self.movie), expires)
+        response = self.client.get(f"/api/play/{self.movie.id}/", {"exp": expires, "sig": signature})
+        self.assertEqual(response.status_code, 403)
+
+    def cloudinary_account(self):
+        return mock.patch.multiple(cloudinary.config(), create=True, cloud_name="demo", api_secret="secret")
+
+    def test_redirect_goes_to_a_signed_delivery_url(self):
+        expires = int(time.time()) + 60
+        with override_settings(PLAYBACK_CLOUDINARY_TOKEN_KEY=""), self.cloudinary_account():
+            response = CloudinaryRedirectBackend().respond(None, Movie.objects.get(id=self.movie.id), expires)
+        location = response["Location"]
+        self.assertTrue(location.startswith("https://"))
+        self.assertIn("/video/authenticated/s--", location)
+        self.assertTrue(location.endswith("/v1/clip.mp4"))
+        self.assertNotIn("/download", location)
+
+    def test_redirect_token_expires_with_the_playback_link(self):
+        expires = int(time.time()) + 60
+        with override_settings(PLAYBACK_CLOUDINARY_TOKEN_KEY="00112233"), self.cloudinary_account():
+            response = CloudinaryRedirectBackend().respond(None, Movie.objects.get(id=self.movie.id), expires)
+        location = response["Location"]
+        self.assertIn("/video/authenticated/", location)
+        self.assertIn(f"__cld_token__=exp={expires}~hmac=", location)
+        self.assertLessEqual(int(response["Cache-Control"].rsplit("=", 1)[1]), 60)
+
+
+# =========================
+# Tiered cache (OTT/cache.py)
+# =========================
+class FileLockTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        caches_setting = {
+            **TEST_CACHES,
+            "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": root.name},
+        }
+        override = override_settings(CACHES=caches_setting)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_one_worker_wins_the_lock(self):
+        won = []
+        start = threading.Barrier(8)
+
+        def worker():
+            start.wait()
+            won.append(caches["default"]._acquire("feed", None))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(won), [False] * 7 + [True])
+        cache._release("feed", None)
+        self.assertTrue(cache._acquire("feed", None))
+
+    def test_stale_lock_is_taken_over(self):
+        self.assertTrue(cache._acquire("feed", None))
+        self.assertFalse(cache._acquire("feed", None))
+        stale = time.time() - cache.lock_timeout - 1
+        os.utime(cache._lock_file("feed", None), (stale, stale))
+        self.assertTrue(cache._acquire("feed", None))
+
+    def test_clear_keeps_held_locks(self):
+        self.assertEqual(cache.get_or_compute("feed", lambda: "rails", 60), "rails")
+        self.assertTrue(cache._acquire("feed", None))
+        cache.clear()
+        self.assertIsNone(cache.get("feed"))
+        self.assertFalse(cache._acquire("feed", None))
+
+
+# =========================
+# Version tags (OTT/versions.py)
+# =========================
+class VersionTests(OTTTestCase):
+    def test_another_workers_bump_is_seen_at_once(self):
+        version = get_version("tag")
+        self.assertEqual(get_version("tag"), version)
+        # Another worker bumps: only the shared tier changes, not our LRU.
+        caches["shared"].set("version:tag", version + 1, timeout=None)
+        self.assertEqual(get_version("tag"), version + 1)
+
+    def test_bumps_never_reuse_a_version(self):
+        seen = {get_version("tag")}
+        for _ in range(50):
+            seen.add(bump_version("tag"))
+        self.assertEqual(len(seen), 51)
+
+    def test_profile_reflects_a_save_immediately(self):
+        user = User.objects.create_user(email="me@x.com", username="before", password="pw")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/api/me/").json()["username"], "before")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.username = "after"
+            user.save()
+        self.assertEqual(self.client.get("/api/me/").json()["username"], "after")
+
+
+# =========================
+# Title autocomplete (OTT/suggest.py)
+# =========================
+class SuggestTests(TestCase):
+    def titles(self, index, query):
+        index._checked_at = 0  # Sync now, not SYNC_SECONDS later.
+        return [match["title"] for match in index.suggest(query)]
+
+    def test_other_workers_catch_up_on_commit(self):
+        other = TitleIndex()
+        self.assertEqual(self.titles(other, "dark"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = Movie.objects.create(title="The Dark Knight")
+        self.assertEqual(self.titles(other, "dark"), ["The Dark Knight"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.delete()
+        with mock.patch.object(other, "rebuild") as rebuild:
+            self.assertEqual(self.titles(other, "dark"), [])
+        rebuild.assert_not_called()
+
+    def test_rolled_back_save_reaches_no_index(self):
+        other = TitleIndex()
+        other.rebuild()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Movie.objects.create(title="Ghost")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.titles(other, "ghost"), [])
+
+    @mock.patch("OTT.suggest.SCAN_LIMIT", 3)
+    def test_busy_prefixes_rank_by_popularity(self):
+        Movie.objects.bulk_create(
+            [Movie(title=f"Aardvark {n}", view_count=n) for n in range(6)]
+            + [Movie(title="Avatar", view_count=100), Movie(title="Zebra", view_count=1000)]
+        )
+        index = TitleIndex()
+        self.assertEqual(self.titles(index, "a")[:3], ["Avatar", "Aardvark 5", "Aardvark 4"])
+        # Memoised until a change touches the prefix.
+        with mock.patch.object(index, "_rank") as rank:
+            self.assertEqual(self.titles(index, "a")[0], "Avatar")
+            index.put(Movie.objects.get(title="Zebra").id, "Zebra", 1000)
+            self.assertEqual(self.titles(index, "a")[0], "Avatar")
+        rank.assert_not_called()
+        index.put(Movie.objects.get(title="Zebra").id, "Alien", 1000)
+        self.assertEqual(self.titles(index, "a")[:2], ["Alien", "Avatar"])
+        index.remove(Movie.objects.get(title="Avatar").id)
+        self.assertEqual(self.titles(index, "a")[:2], ["Alien", "Aardvark 5"])
+
+    def test_invalidate_forces_a_rebuild(self):
+        other = TitleIndex()
+        other.rebuild()
+        Movie.objects.bulk_create([Movie(title="Bulk Loaded")])
+        invalidate()
+        self.assertEqual(self.titles(other, "bulk"), ["Bulk Loaded"])
+
+
+# =========================
+# Uploads: size limits, dedup, reference-counted deletion
+# (OTT/uploads.py, OTT/media_gc.py)
+# =========================
+class UploadTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage", MEDIA_ROOT=media.name,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.alice = User.objects.create_user(email="alice@x.com", password="pw")
+        self.bob = User.objects.create_user(email="bob@x.com", password="pw")
+
+    def upload_pic(self, user, content=b"same picture bytes", client=None):
+        client = client or self.client
+        client.force_login(user)
+        return client.post("/api/profile/update/", {"profile_pic": SimpleUploadedFile("me.png", content)})
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=1000)
+    def test_oversized_request_is_413_not_a_csrf_403(self):
+        response = self.upload_pic(self.alice, b"x" * 2000, client=Client(enforce_csrf_checks=True))
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(UPLOAD_MAX_SIZES={"default": 10, "profile_pic": 10})
+    def test_oversized_file_is_rejected(self):
+        self.assertEqual(self.upload_pic(self.alice).status_code, 413)
+        self.alice.refresh_from_db()
+        self.assertFalse(self.alice.profile_pic)
+
+    def test_same_bytes_are_stored_once(self):
+        self.upload_pic(self.alice)
+        self.upload_pic(self.bob)
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.alice.profile_pic.name, self.bob.profile_pic.name)
+        self.assertEqual(MediaAsset.objects.count(), 1)
+        self.assertEqual(len(default_storage.listdir("profiles")[1]), 1)
+
+    def test_shared_file_is_deleted_with_its_last_reference(self):
+        self.upload_pic(self.alice)
+        self.upload_pic(self.bob)
+        name = User.objects.get(id=self.alice.id).profile_pic.name
+
+        self.client.force_login(self.alice)
+        self.client.post("/api/profile/delete-pic/")
+        self.assertEqual(drain(grace=0), (0, 1, 0))  # Bob still uses it.
+        self.assertTrue(default_storage.exists(name))
+
+        self.client.force_login(self.bob)
+        self.client.post("/api/profile/delete-pic/")
+        self.assertEqual(drain(grace=0), (1, 0, 0))
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaAsset.objects.exists())
+        self.assertFalse(MediaDeletion.objects.exists())
+
+
+# =========================
+# Data exports (OTT/exports.py)
+# =========================
+class ExportTests(OTTTestCase):
+    def test_csv_cells_that_look_like_formulas_are_escaped(self):
+        User.objects.create_user(email="evil@x.com", username="=HYPERLINK(\"http://x\")")
+        User.objects.create_user(email="fine@x.com", username="plain")
+        csv_text = b"".join(export_stream("users", "csv")).decode()
+        self.assertIn("\"'=HYPERLINK(\"\"http://x\"\")\"", csv_text)
+        self.assertIn(",plain,", csv_text)
+
+    def test_jsonl_is_left_as_is(self):
+        User.objects.create_user(email="evil@x.com", username="@cmd")
+        self.assertIn(b'"username":"@cmd"', b"".join(export_stream("users", "jsonl")))
+
+    @override_settings(EXPORTS_OVER_HTTP=False)
+    def test_http_exports_are_off_for_sync_workers(self):
+        staff = User.objects.create_superuser(email="staff@x.com", password="pw")
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get("/exports/users/").status_code, 503)
+
+
+# =========================
+# Rate limiting (OTT/ratelimit.py)
+# =========================
+@override_settings(
+    RATE_LIMIT_ENABLED=True, RATE_LIMITS={"api_movie_list": {"ip": "2/m"}}, RATE_LIMIT_PROXY_COUNT=1,
+)
+class RateLimitTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        table = tempfile.NamedTemporaryFile()
+        self.addCleanup(table.close)
+        override = override_settings(RATE_LIMIT_TABLE=table.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name in ("_buckets", "_limits"):
+            patcher = mock.patch.object(ratelimit, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, forwarded_for):
+        return self.client.get("/api/movies/", HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+    def test_over_the_limit_is_429_with_retry_after(self):
+        self.assertEqual([self.get("1.1.1.1") for _ in range(2)], [200, 200])
+        response = self.client.get("/api/movies/", HTTP_X_FORWARDED_FOR="1.1.1.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+    def test_clients_behind_the_load_balancer_get_their_own_buckets(self):
+        # Same REMOTE_ADDR (the balancer) for everyone.
+        self.assertEqual([self.get("1.1.1.1") for _ in range(3)], [200, 200, 429])
+        self.assertEqual(self.get("2.2.2.2"), 200)
+        # Entries a client adds on the left don't buy a new bucket.
+        self.assertEqual(self.get("9.9.9.9, 1.1.1.1"), 429)
+
+    def test_batched_calls_are_limited_one_by_one(self):
+        response = self.client.get(
+            "/api/batch/", {"path": ["/api/movies/"] * 3}, HTTP_X_FORWARDED_FOR="1.1.1.1",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["responses"]
+        self.assertEqual([r["status"] for r in results], [200, 200, 429])
+        self.assertGreaterEqual(results[2]["body"]["retry_after"], 1)
+        # The batch used up the client's bucket for direct calls too.
+        self.assertEqual(self.get("1.1.1.1"), 429)
+
+    def test_workers_share_the_table(self):
+        first = ratelimit.SharedBuckets(settings.RATE_LIMIT_TABLE, 64)
+        second = ratelimit.SharedBuckets(settings.RATE_LIMIT_TABLE, 64)
+        capacity, refill = ratelimit.parse_rate("2/m")
+        self.assertTrue(first.take("key", capacity, refill)[0])
+        self.assertTrue(second.take("key", capacity, refill)[0])
+        self.assertFalse(first.take("key", capacity, refill)[0])
+
+
+# =========================
+# Per-user overlays (OTT/overlays.py)
+# =========================
+class OverlayTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email="viewer@x.com", password="pw")
+        self.listed, self.watched, self.other = (Movie.objects.create(title=f"Movie {n}") for n in range(3))
+        Watchlist.objects.create(user=self.user, movie=self.listed)
+        ViewHistory.objects.create(user=self.user, movie=self.watched)
+        self.last = ViewHistory.objects.create(user=self.user, movie=self.watched).date
+        # Someone else's activity doesn't show through.
+        stranger = User.objects.create_user(email="stranger@x.com")
+        Watchlist.objects.create(user=stranger, movie=self.other)
+
+    def test_flags_per_movie(self):
+        self.client.force_login(self.user)
+        rows = {row["id"]: row for row in self.client.get("/api/movies/").json()}
+        self.assertTrue(rows[self.listed.id]["in_watchlist"])
+        self.assertFalse(rows[self.listed.id]["watched"])
+        self.assertTrue(rows[self.watched.id]["watched"])
+        self.assertIsNotNone(rows[self.watched.id]["last_watched_at"])
+        self.assertEqual(
+            [rows[self.other.id][name] for name in ("in_watchlist", "watched", "last_watched_at")],
+            [False, False, None],
+        )
+
+    def test_query_count_does_not_grow_with_the_catalog(self):
+        rows = [{"id": movie_id} for movie_id in range(1, 2000)]
+        with self.assertNumQueries(2):
+            long = add_overlays(rows, self.user, ["in_watchlist", "last_watched_at"])
+        self.assertEqual(long[self.watched.id - 1]["last_watched_at"], self.last)
+        with self.assertNumQueries(2):
+            add_overlays(rows[:10], self.user, ["in_watchlist", "watched"])
+        # Only the queries the fields need.
+        with self.assertNumQueries(1):
+            add_overlays(rows, self.user, ["in_watchlist"])
+
+
+# =========================
+# Home feed (OTT/feed.py)
+# =========================
+class HomeFeedTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email="viewer@x.com", password="pw")
+        movies = [Movie.objects.create(title=f"Movie {n}", view_count=n) for n in range(5)]
+        for movie in movies[:3]:
+            Watchlist.objects.create(user=self.user, movie=movie)
+            ViewHistory.objects.create(user=self.user, movie=movie)
+
+    def feed(self):
+        response = self.client.get("/api/home-feed/")
+        self.assertEqual(response.status_code, 200)
+        return {rail["key"]: [movie["title"] for movie in rail["movies"]] for rail in response.json()["rails"]}
+
+    def test_anonymous_feed_reads_shared_rails_from_the_cache(self):
+        # One query per shared rail on a miss...
+        with self.assertNumQueries(2):
+            rails = self.feed()
+        self.assertEqual(list(rails), ["newest", "most_viewed"])
+        self.assertEqual(rails["most_viewed"][0], "Movie 4")
+        # ...none once they are cached.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.feed(), rails)
+
+    def test_signed_in_feed_costs_a_fixed_number_of_queries(self):
+        self.client.force_login(self.user)
+        # Session + user, two shared rails, watchlist (1) and recently watched (2).
+        with self.assertNumQueries(7):
+            rails = self.feed()
+        self.assertEqual(list(rails), ["newest", "most_viewed", "watchlist", "recently_watched"])
+        self.assertEqual(sorted(rails["watchlist"]), ["Movie 0", "Movie 1", "Movie 2"])
+        # Shared rails cached: only the per-user ones are queried again, and
+        # more activity doesn't add queries.
+        Watchlist.objects.create(user=self.user, movie=Movie.objects.get(title="Movie 3"))
+        with self.assertNumQueries(5):
+            self.assertEqual(len(self.feed()["watchlist"]), 4)
+
+
+# =========================
+# Request batching (OTT/batch.py)
+# =========================
+class BatchTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email="viewer@x.com", password="pw")
+        Movie.objects.create(title="Movie")
+
+    def batch(self, *paths):
+        return self.client.get("/api/batch/", {"path": list(paths)})
+
+    def test_only_gets_of_api_paths(self):
+        self.assertEqual(self.client.post("/api/batch/", {"path": "/api/movies/"}).status_code, 405)
+        for path in ("/admin/", "https://evil.example/api/movies/", "//evil.example/api/movies/"):
+            response = self.batch("/api/movies/", path)
+            self.assertEqual(response.status_code, 400, path)
+            self.assertIn("Not an API path", response.json()["error"])
+        self.assertEqual(self.batch().status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(*["/api/movies/"] * 3).status_code, 400)
+
+    def test_nested_batches_are_refused(self):
+        response = self.batch("/api/movies/", "/api/batch/?path=/api/movies/")
+        self.assertEqual(response.status_code, 200)
+        first, nested = response.json()["responses"]
+        self.assertEqual(first["status"], 200)
+        self.assertEqual(first["body"][0]["title"], "Movie")
+        self.assertEqual(nested["status"], 400)
+        self.assertIn("nested", nested["body"]["error"])
+
+    def test_sub_requests_share_the_batch_auth_context(self):
+        self.assertEqual(self.batch("/api/me/").json()["responses"][0]["status"], 302)
+        self.client.force_login(self.user)
+        # The session and the user are loaded once for the whole batch.
+        with self.assertNumQueries(2):
+            responses = self.batch("/api/me/", "/api/me/").json()["responses"]
+        self.assertEqual([r["status"] for r in responses], [200, 200])
+        self.assertEqual([r["body"]["email"] for r in responses], ["viewer@x.com"] * 2)
+
+    def test_async_views_are_awaited_together(self):
+        started = []
+
+        async def view(request):
+            started.append(request.path)
+            await asyncio.sleep(0)
+            # Run one after another, the first view would only see itself.
+            return HttpResponse(str(len(started)), content_type="text/plain")
+
+        def fake_resolve(path):
+            if path.startswith("/api/async/"):
+                return ResolverMatch(view, (), {}, url_name="async_test")
+            return resolve(path)
+
+        with mock.patch("OTT.batch.resolve", side_effect=fake_resolve):
+            responses = self.batch("/api/async/1/", "/api/movies/", "/api/async/2/").json()["responses"]
+        self.assertEqual([r["path"] for r in responses], ["/api/async/1/", "/api/movies/", "/api/async/2/"])
+        self.assertEqual([responses[0]["body"], responses[2]["body"]], ["2", "2"])
+        self.assertEqual(responses[1]["status"], 200)
+
+
+# =========================
+# Orphaned media queue (OTT/media_gc.py)
+# =========================
+class MediaGCTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.deleted = []
+
+        def delete(references):
+            self.deleted.extend(references)
+            return {}
+
+        patcher = mock.patch.dict(media_gc.DELETERS, {MediaDeletion.CLOUDINARY: delete})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queued(self):
+        return sorted(MediaDeletion.objects.values_list("reference", flat=True))
+
+    def test_replaced_and_deleted_media_is_queued(self):
+        movie = Movie.objects.create(title="Movie", video_url="video/authenticated/v1/old.mp4")
+        movie.video_url = "video/authenticated/v2/new.mp4"
+        movie.save()
+        self.assertEqual(self.queued(), ["video/authenticated/v1/old.mp4"])
+        movie.title = "Renamed"
+        movie.save(update_fields=["title"])
+        Movie.objects.get(id=movie.id).delete()
+        self.assertEqual(self.queued(), ["video/authenticated/v1/old.mp4", "video/authenticated/v2/new.mp4"])
+
+    def test_entries_wait_out_the_grace_period(self):
+        Movie.objects.create(title="Movie", video_url="video/authenticated/v1/clip.mp4").delete()
+        self.assertEqual(drain(grace=3600), (0, 0, 0))
+        self.assertEqual(drain(grace=0), (1, 0, 0))
+        self.assertEqual(self.deleted, ["video/authenticated/v1/clip.mp4"])
+
+    def test_shared_asset_survives_until_its_last_row_goes(self):
+        first = Movie.objects.create(title="First", video_url="video/authenticated/v1/shared.mp4")
+        second = Movie.objects.create(title="Second", video_url="video/authenticated/v1/shared.mp4")
+        first.delete()
+        self.assertEqual(drain(grace=0), (0, 1, 0))
+        self.assertEqual(self.deleted, [])
+        second.delete()
+        self.assertEqual(drain(grace=0), (1, 0, 0))
+        self.assertEqual(self.deleted, ["video/authenticated/v1/shared.mp4"])
+
+    def test_failed_deletions_are_retried(self):
+        media_gc.DELETERS[MediaDeletion.CLOUDINARY] = lambda references: {ref: "boom" for ref in references}
+        Movie.objects.create(title="Movie", video_url="video/authenticated/v1/clip.mp4").delete()
+        self.assertEqual(drain(grace=0), (0, 0, 1))
+        entry = MediaDeletion.objects.get()
+        self.assertEqual((entry.attempts, entry.last_error), (1, "boom"))
+
+
+# =========================
+# Engagement counters (OTT/stats.py)
+# =========================
+class MovieStatsTests(OTTTestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(title="Movie")
+        self.users = [User.objects.create_user(email=f"user{n}@x.com") for n in range(3)]
+
+    def counts(self):
+        stats = MovieStats.objects.get(movie=self.movie)
+        return stats.watchlist_count, stats.viewer_count
+
+    def api_counts(self):
+        row = self.client.get("/api/movies/", {"fields": "id,watchlist_count,viewer_count"}).json()[0]
+        return row["watchlist_count"], row["viewer_count"]
+
+    def test_counters_follow_commits(self):
+        self.assertEqual(self.api_counts(), (0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            Watchlist.objects.create(user=self.users[0], movie=self.movie)
+            ViewHistory.objects.create(user=self.users[0], movie=self.movie)
+            ViewHistory.objects.create(user=self.users[0], movie=self.movie)
+            ViewHistory.objects.create(user=self.users[1], movie=self.movie)
+        self.assertEqual(self.counts(), (1, 2))
+        # Cached for STATS_CACHE_TIMEOUT; shown once that has passed.
+        self.assertEqual(self.api_counts(), (0, 0))
+        cache.clear()
+        self.assertEqual(self.api_counts(), (1, 2))
+
+    def test_events_leave_the_default_catalog_payload_cached(self):
+        row = self.client.get("/api/movies/").json()[0]
+        self.assertFalse(set(row) & {"watchlist_count", "viewer_count", "last_viewed_at"})
+        with self.captureOnCommitCallbacks(execute=True):
+            Watchlist.objects.create(user=self.users[0], movie=self.movie)
+            ViewHistory.objects.create(user=self.users[0], movie=self.movie)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/movies/").json()[0], row)
+
+    def test_rolled_back_writes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Watchlist.objects.create(user=self.users[0], movie=self.movie)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_reconcile_fixes_drifted_counters(self):
+        # Bulk writes send no signals; a lost update left a wrong count.
+        Watchlist.objects.bulk_create([Watchlist(user=user, movie=self.movie) for user in self.users])
+        ViewHistory.objects.bulk_create([ViewHistory(user=self.users[0], movie=self.movie)])
+        MovieStats.objects.filter(movie=self.movie).update(viewer_count=7)
+        unsynced = Movie.objects.create(title="No stats row")
+        MovieStats.objects.filter(movie=unsynced).delete()
+
+        self.assertEqual(reconcile(), (2, 2))
+        self.assertEqual(self.counts(), (3, 1))
+        self.assertTrue(MovieStats.objects.filter(movie=unsynced).exists())
+        self.assertEqual(reconcile(), (2, 0))
@@ -0,0 +1,133 @@
+"""
+Upload handling for media fields (movie thumbnail/video, profile picture).
+
+``HashingUploadHandler`` sits first in ``FILE_UPLOAD_HANDLERS``. It sees
+every chunk as the multipart parser reads it, feeds it into a SHA-256 and
+passes it on untouched to Django's memory/temp-file handlers. Files are
+never re-read to hash them. Per-field size limits (``UPLOAD_MAX_SIZES``)
+are checked as bytes arrive: an oversized file is dropped at the chunk that
+crosses the limit, while the other form fields (CSRF token included) are
+kept. Oversized requests never get here; RequestSizeLimitMiddleware answers
+them with a 413 from Content-Length alone. Results are left on the request:
+
+    request.upload_digests  {field name: sha256 hex}
+    request.upload_errors   {field name: message}
+
+``assign_media`` then uses the digest to skip storage altogether when the
+same bytes were stored before for that model field (``MediaAsset``): the
+field is pointed at the existing asset instead of uploading again.
+
+A stored asset can therefore be shared by several rows, so nothing may
+delete it because one row let go of it: ``referenced()`` is the reference
+count check that OTT/media_gc.py runs before deleting anything.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db.models import Q
+from django.template.defaultfilters import filesizeformat
+
+from .models import MediaAsset, MediaDeletion, Movie, User
+
+# Media fields per storage backend, for reference counting.
+MOVIE_MEDIA = ("thumbnail_url", "video_url")
+USER_MEDIA = ("profile_pic",)
+
+
+def max_size(field_name):
+    sizes = settings.UPLOAD_MAX_SIZES
+    return sizes.get(field_name, sizes["default"])
+
+
+class HashingUploadHandler(FileUploadHandler):
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request.upload_digests = {}
+        self.request.upload_errors = {}
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.limit = max_size(field_name)
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        if content_length is not None and content_length > self.limit:
+            self._reject()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.limit:
+            self._reject()
+        self.sha256.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.request.upload_digests[self.field_name] = self.sha256.hexdigest()
+        # Let the next handler (memory / temp file) build the UploadedFile.
+        return None
+
+    def _reject(self):
+        self.request.upload_errors[self.field_name] = (
+            f"{self.file_name} is larger than {filesizeformat(self.limit)}."
+        )
+        raise SkipFile()
+
+
+def upload_errors(request):
+    """Size-limit errors from this request's upload, ``{}`` if none."""
+    request.FILES  # Parses the body if nothing has yet.
+    return getattr(request, "upload_errors", {})
+
+
+def _kind(instance, attname):
+    return f"{instance._meta.label_lower}.{attname}"
+
+
+def assign_media(request, field_name, instance, attname):
+    """
+    Set ``instance.<attname>`` from the file uploaded as ``field_name``, if
+    any. When its digest matches media already stored for this field, point
+    at that instead of the upload, so saving doesn't store it again. Returns
+    the digest (or None) for ``remember_media`` after the instance is saved.
+    """
+    upload = request.FILES.get(field_name)
+    if upload is None:
+        return None
+    digest = getattr(request, "upload_digests", {}).get(field_name)
+    asset = None
+    if digest:
+        asset = MediaAsset.objects.filter(kind=_kind(instance, attname), sha256=digest).first()
+    setattr(instance, attname, asset.reference if asset else upload)
+    return digest
+
+
+def remember_media(instance, attname, digest):
+    """Record the stored reference of a freshly saved upload under its digest."""
+    if not digest:
+        return
+    reference = stored_reference(getattr(instance, attname))
+    if reference:
+        MediaAsset.objects.get_or_create(
+            kind=_kind(instance, attname), sha256=digest, defaults={"reference": reference},
+        )
+
+
+# -------------------------
+# Reference counting
+# -------------------------
+def stored_reference(value):
+    """What a media field stores: Cloudinary "type/version/id" or a storage name."""
+    if not value:
+        return ""
+    if hasattr(value, "get_prep_value"):
+        return value.get_prep_value() or ""
+    return getattr(value, "name", None) or str(value)
+
+
+def referenced(backend, references):
+    """The subset of ``references`` some row still points at."""
+    model, fields = (Movie, MOVIE_MEDIA) if backend == MediaDeletion.CLOUDINARY else (User, USER_MEDIA)
+    query = Q()
+    for field in fields:
+        query |= Q(**{f"{field}__in": references})
+    used = {stored_reference(value) for row in model.objects.filter(query).values_list(*fields) for value in row}
+    return set(references) & used
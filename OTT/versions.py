@@ -0,0 +1,57 @@
+"""
+Version tags for cached data.
+
+Cached fragments/payloads put ``get_version(tag)`` in their key; bumping the
+tag on writes makes every old entry unreachable at once (they simply expire),
+so there is no need to track and delete individual keys.
+
+Tags live in the shared cache tier only: with the TieredCache the versioned
+entries may sit in a worker's local LRU, but the version itself is read
+from the shared tier every time, so a bump by any worker is seen at once.
+A bump writes a new random token instead of incrementing, so it is a
+single atomic ``set`` on every backend (FileBasedCache has no atomic incr)
+and concurrent bumps can't cancel each other out.
+"""
+import secrets
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG = "catalog"
+
+
+def profile_tag(user_id):
+    """Per-user tag for cached profile payloads."""
+    return f"profile:{user_id}"
+
+
+def _key(tag):
+    return f"version:{tag}"
+
+
+def _shared():
+    return getattr(cache, "shared", cache)
+
+
+def _fresh():
+    # Random, so a tag that was evicted never comes back with a value some
+    # stale entry is still stored under.
+    return secrets.randbits(63)
+
+
+def get_version(tag):
+    return _shared().get_or_set(_key(tag), _fresh, timeout=None)
+
+
+def bump_version(tag):
+    version = _fresh()
+    _shared().set(_key(tag), version, timeout=None)
+    return version
+
+
+def bump_on_commit(tag):
+    """
+    Bump ``tag`` once the current transaction commits: bumping earlier lets
+    a reader cache pre-commit data under the new version until the next bump.
+    """
+    transaction.on_commit(lambda: bump_version(tag))
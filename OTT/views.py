@@ -1,22 +1,54 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth import authenticate, login, logout, get_user_model, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.cache import cache_control, never_cache
 from django.contrib.admin.views.decorators import staff_member_required
 from django.middleware.csrf import get_token
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .models import Movie
-from .serializers import UserSerializer, MovieSerializer
+from .models import Movie, UserActivity, WatchProgress, ONLINE_WINDOW
+from .serializers import (
+    UserSerializer, MovieSerializer, MovieRowSerializer, ProgressHeartbeatSerializer,
+    WatchProgressSerializer, movie_fields, movie_queryset,
+)
+from .batch import BatchError, run_batch
+from .cache import get_or_compute
+from .exports import EXPORTS, FORMATS as EXPORT_FORMATS, export_filename, export_stream
+from .feed import home_feed
+from .overlays import add_overlays
+from .pagination import keyset_paginate
+from .progress import progress_buffer
+from .suggest import title_index
+from .uploads import assign_media, remember_media, upload_errors
+from .signing import get_backend as get_playback_backend, get_signer, video_resource
+from .stats import STATS_FIELDS
+from .renderers import ORJSONResponse
+from .versions import CATALOG, get_version, profile_tag
 
 
 User = get_user_model()
 
+MOVIE_LIST_PAGE_SIZE = 25
+USER_DIRECTORY_PAGE_SIZE = 50
+CONTINUE_WATCHING_SIZE = 20
+CATALOG_CACHE_TIMEOUT = 300
+# Payloads with engagement counters (OTT/stats.py): these change on every
+# view, so they expire instead of following a version tag.
+STATS_CACHE_TIMEOUT = 30
+PROFILE_CACHE_TIMEOUT = 600
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
+
 
 # =============================
 # ✅ CACHE HELPERS (Back button fix)
@@ -28,6 +60,18 @@ def no_cache(view_func):
     return cache_control(no_cache=True, no_store=True, must_revalidate=True, max_age=0)(view_func)
 
 
+# =============================
+# ❤️ HEALTH CHECK
+# =============================
+@never_cache
+def healthz(request):
+    """
+    Load balancer / gunicorn liveness probe. Deliberately touches nothing
+    (no session, user or database) so it stays cheap at one hit per second.
+    """
+    return HttpResponse("ok", content_type="text/plain")
+
+
 # =============================
 # 🌍 LANDING
 # =============================
@@ -79,8 +123,50 @@ def home(request):
 @staff_member_required(login_url="login")
 @never_cache
 def user_details(request):
-    users = User.objects.select_related("activity").all()
-    return render(request, "UserDetails.html", {"users": users})
+    q = request.GET.get("q", "").strip()
+    role = request.GET.get("role", "")
+    online = request.GET.get("online") == "1"
+    blocked = request.GET.get("blocked") == "1"
+
+    users = User.objects.select_related("activity").only(
+        "id", "email", "username", "is_superuser", "is_staff", "is_admin", "is_blocked",
+        "activity__last_seen",
+    ).search(q)
+    if role == "admin":
+        users = users.admins()
+    elif role == "user":
+        users = users.regular()
+    if online:
+        users = users.online()
+    if blocked:
+        users = users.blocked()
+
+    page = keyset_paginate(
+        users, "id",
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=USER_DIRECTORY_PAGE_SIZE,
+        descending=True,
+    )
+
+    # Totals come from aggregates, not from walking the rows.
+    counts = User.objects.aggregate(
+        total=Count("id"),
+        blocked=Count("id", filter=Q(is_blocked=True)),
+    )
+    counts["online"] = UserActivity.objects.filter(last_seen__gte=timezone.now() - ONLINE_WINDOW).count()
+
+    filters = {k: v for k, v in {"q": q, "role": role, "online": "1" if online else "",
+                                 "blocked": "1" if blocked else ""}.items() if v}
+    return render(request, "UserDetails.html", {
+        "page": page,
+        "counts": counts,
+        "q": q,
+        "role": role,
+        "online": online,
+        "blocked": blocked,
+        "filter_query": urlencode(filters),
+    })
 
 
 def login_view(request):
@@ -175,6 +261,31 @@ def change_password(request):
 # =============================
 # ✅ ADMIN MOVIE MANAGEMENT (Django templates)
 # =============================
+@login_required(login_url="login")
+@staff_member_required(login_url="login")
+@never_cache
+def export_data(request, name):
+    """
+    ``/exports/<users|history|watchlist>/?format=csv|jsonl&gzip=1``, streamed
+    straight from the database (OTT/exports.py).
+    """
+    fmt = request.GET.get("format", "csv")
+    if name not in EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export.")
+    if not settings.EXPORTS_OVER_HTTP:
+        return HttpResponse(
+            "Exports are off for sync gunicorn workers; run `manage.py export_data` instead.",
+            status=503, content_type="text/plain",
+        )
+    gzip = request.GET.get("gzip") in ("1", "true")
+    response = StreamingHttpResponse(
+        export_stream(name, fmt, gzip),
+        content_type="application/gzip" if gzip else f"{EXPORT_FORMATS[fmt]}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{export_filename(name, fmt, gzip)}"'
+    return response
+
+
 @login_required(login_url="login")
 @staff_member_required(login_url="login")
 @no_cache
@@ -188,8 +299,29 @@ def dashboard(request):
 @staff_member_required(login_url="login")
 @no_cache
 def movie_list(request):
-    movies = Movie.objects.all()
-    return render(request, "MovieList.html", {"movies": movies})
+    q = request.GET.get("q", "").strip()
+    movies = Movie.objects.select_related("stats").only(
+        "id", "title", "description", "thumbnail_url", "video_url",
+        "stats__watchlist_count", "stats__viewer_count", "stats__last_viewed_at",
+    )
+    if q:
+        movies = movies.filter(title__icontains=q)
+
+    # Lazy: only evaluated when the template's fragment cache misses. The
+    # engagement columns (MovieStats, same query) lag by up to its timeout.
+    page = SimpleLazyObject(lambda: keyset_paginate(
+        movies, "id",
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=MOVIE_LIST_PAGE_SIZE,
+        descending=True,
+    ))
+    return render(request, "MovieList.html", {
+        "page": page,
+        "q": q,
+        "catalog_version": get_version(CATALOG),
+        "page_key": f"{request.GET.get('after', '')}:{request.GET.get('before', '')}",
+    })
 
 
 @login_required(login_url="login")
@@ -197,17 +329,22 @@ def movie_list(request):
 @no_cache
 def create_movie(request):
     if request.method == "POST":
-        title = request.POST.get("movie_name")
-        description = request.POST.get("movie_description")
-        thumbnail = request.FILES.get("movie_image")
-        video = request.FILES.get("movie_video")
-
-        Movie.objects.create(
-            title=title,
-            description=description,
-            thumbnail_url=thumbnail,
-            video_url=video
+        errors = upload_errors(request)
+        if errors:
+            for error in errors.values():
+                messages.error(request, error)
+            return render(request, "createMovies.html", status=413)
+
+        movie = Movie(
+            title=request.POST.get("movie_name"),
+            description=request.POST.get("movie_description"),
         )
+        # Same bytes uploaded before -> reuse the stored asset (OTT/uploads.py).
+        thumbnail_digest = assign_media(request, "movie_image", movie, "thumbnail_url")
+        video_digest = assign_media(request, "movie_video", movie, "video_url")
+        movie.save()
+        remember_media(movie, "thumbnail_url", thumbnail_digest)
+        remember_media(movie, "video_url", video_digest)
         return redirect("movie_list")
 
     return render(request, "createMovies.html")
@@ -223,13 +360,18 @@ def edit_movie(request, movie_id):
         movie.title = request.POST.get("title", movie.title)
         movie.description = request.POST.get("description", movie.description)
 
-        if "thumbnail_url" in request.FILES:
-            movie.thumbnail_url = request.FILES["thumbnail_url"]
+        errors = upload_errors(request)
+        if errors:
+            for error in errors.values():
+                messages.error(request, error)
+            return render(request, "edit.html", {"movie": movie}, status=413)
 
-        if "video_url" in request.FILES:
-            movie.video_url = request.FILES["video_url"]
+        thumbnail_digest = assign_media(request, "thumbnail_url", movie, "thumbnail_url")
+        video_digest = assign_media(request, "video_url", movie, "video_url")
 
         movie.save()
+        remember_media(movie, "thumbnail_url", thumbnail_digest)
+        remember_media(movie, "video_url", video_digest)
         return redirect("movie_list")
 
     return render(request, "edit.html", {"movie": movie})
@@ -333,9 +475,30 @@ class MovieListAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        movies = Movie.objects.all()
-        serializer = MovieSerializer(movies, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # ?fields=id,title,thumbnail / ?exclude=description narrow both the
+        # SELECT and the work done per row.
+        fields, overlay = movie_fields(request)
+        # Overlays are matched to rows by id.
+        public = ["id", *fields] if overlay and "id" not in fields else fields
+
+        def serialize():
+            movies = movie_queryset(public)
+            return MovieRowSerializer(movies, fields=public, context={"request": request}).data
+
+        # Signed video URLs are absolute and expire: key on host and the
+        # signing bucket too, so a cached payload never outlives its links.
+        key = ":".join([
+            "api_movies", str(get_version(CATALOG)), ",".join(public),
+            request.scheme, request.get_host(), str(get_signer().expiry()),
+        ])
+        timeout = STATS_CACHE_TIMEOUT if set(public) & set(STATS_FIELDS) else CATALOG_CACHE_TIMEOUT
+        data = get_or_compute(key, serialize, timeout)
+        if overlay:
+            # Anonymous requests get the shared payload as is.
+            data = add_overlays(data, request.user, overlay)
+            if "id" not in fields:
+                data = [{name: row[name] for name in fields + overlay} for row in data]
+        return Response(data, status=status.HTTP_200_OK)
 
 
 
@@ -343,9 +506,58 @@ class MovieDetailAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, movie_id):
-        movie = get_object_or_404(Movie, id=movie_id)
-        serializer = MovieSerializer(movie, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields, overlay = movie_fields(request)
+        movie = get_object_or_404(movie_queryset(fields), id=movie_id)
+        data = MovieSerializer(movie, fields=fields, context={"request": request}).data
+        if overlay:
+            data = {**data, **add_overlays([{"id": movie.id}], request.user, overlay)[0]}
+            if "id" not in fields:
+                del data["id"]
+        return Response(data, status=status.HTTP_200_OK)
+
+class ProgressAPIView(APIView):
+    """
+    POST: player heartbeat {movie_id, position, duration}. Buffered in memory
+    and persisted in batches (OTT/progress.py), so this never hits the DB.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = ProgressHeartbeatSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        progress_buffer.record(request.user.id, data["movie_id"], data["position"], data.get("duration"))
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class ProgressDetailAPIView(APIView):
+    """GET: resume position for one movie."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, movie_id):
+        pending = progress_buffer.pending(request.user.id, movie_id)
+        if pending:
+            position, duration, _ = pending
+        else:
+            progress = WatchProgress.objects.filter(user=request.user, movie_id=movie_id).first()
+            position, duration = (progress.position, progress.duration) if progress else (0, None)
+        return Response({"movie_id": movie_id, "position": position, "duration": duration})
+
+
+class ContinueWatchingAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # One query on ott_progress_rail_idx, movie and its stats joined in.
+        items = (
+            WatchProgress.objects.filter(user=request.user, finished=False)
+            .select_related("movie", "movie__stats")
+            .order_by("-updated_at")[:CONTINUE_WATCHING_SIZE]
+        )
+        serializer = WatchProgressSerializer(items, many=True, context={"request": request})
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+
 
 class ChangePasswordAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -382,6 +594,65 @@ class ChangePasswordAPIView(APIView):
         )
         
 
+class HomeFeedAPIView(APIView):
+    """
+    All home page rails in one response (OTT/feed.py): shared rails from
+    the cache, per-user rails (watchlist, recently watched) looked up here.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        rails = home_feed(request.user)
+        # One signing batch for every movie on the page.
+        movies = [movie for _, _, rail in rails for movie in rail]
+        data = iter(MovieSerializer(movies, many=True, context={"request": request}).data)
+        return Response({
+            "rails": [
+                {"key": name, "title": title, "movies": [next(data) for _ in rail]}
+                for name, title, rail in rails
+            ]
+        }, status=status.HTTP_200_OK)
+
+
+@never_cache
+def play_video(request, movie_id):
+    """
+    Entry point of the signed playback URLs minted by OTT.signing. Rejects
+    missing, tampered or expired signatures; otherwise the configured
+    PLAYBACK_BACKEND serves or redirects to the video.
+    """
+    movie = get_object_or_404(Movie.objects.only("id", "video_url"), id=movie_id)
+    expires = request.GET.get("exp")
+    resource = video_resource(movie)
+    if not resource or not get_signer().verify(resource, expires, request.GET.get("sig")):
+        return HttpResponseForbidden("Invalid or expired playback link.")
+    return get_playback_backend().respond(request, movie, int(expires))
+
+
+@require_GET
+@never_cache
+def batch_api(request):
+    """Several GET /api/ calls in one round trip; see OTT/batch.py."""
+    try:
+        results, cookies = run_batch(request, request.GET.getlist("path"))
+    except BatchError as exc:
+        return ORJSONResponse({"error": str(exc)}, status=400)
+    response = ORJSONResponse({"responses": results})
+    response.cookies.update(cookies)
+    return response
+
+
+@require_GET
+def movie_suggest_api(request):
+    """Typeahead: ``?q=dar&limit=10`` -> ranked title matches (OTT/suggest.py)."""
+    try:
+        limit = min(max(int(request.GET.get("limit", SUGGEST_LIMIT)), 1), SUGGEST_MAX_LIMIT)
+    except ValueError:
+        limit = SUGGEST_LIMIT
+    query = request.GET.get("q", "")[:100]
+    return ORJSONResponse({"query": query, "results": title_index.suggest(query, limit)})
+
+
 def home_movies_api(request):
     qs = Movie.objects.order_by("-id")[:3]
 
@@ -410,7 +681,7 @@ def home_movies_api(request):
             "thumbnail": thumb,
         })
 
-    return JsonResponse({"movies": movies})
+    return ORJSONResponse({"movies": movies})
 
 @login_required
 def users_status_api(request):
@@ -419,7 +690,7 @@ def users_status_api(request):
     data = []
     for u in users:
         # activity always exists because of signal, but safe anyway
-        online = u.activity.is_online() if hasattr(u, "activity") else False
+        online = u.activity.is_online if hasattr(u, "activity") else False
 
         data.append({
             "id": u.id,
@@ -428,23 +699,28 @@ def users_status_api(request):
             "is_online": online
         })
 
-    return JsonResponse({"users": data})
+    return ORJSONResponse({"users": data})
 
 @login_required
 @login_required
 @never_cache
 def profile_me(request):
     u = request.user
-    return JsonResponse({
-        "id": u.id,
-        "email": u.email,
-        "username": u.username,
-        "is_staff": u.is_staff,
-        "phone": getattr(u, "phone", "") or "",
-        "hobbies": getattr(u, "hobbies", "") or "",
-        "bio": getattr(u, "bio", "") or "",
-        "profile_pic": u.profile_pic.url if getattr(u, "profile_pic", None) else "",
-    })
+    # Invalidated by any save of the user (bump_profile_version).
+    return ORJSONResponse(get_or_compute(
+        f"profile_me:{u.id}:{get_version(profile_tag(u.id))}",
+        lambda: {
+            "id": u.id,
+            "email": u.email,
+            "username": u.username,
+            "is_staff": u.is_staff,
+            "phone": getattr(u, "phone", "") or "",
+            "hobbies": getattr(u, "hobbies", "") or "",
+            "bio": getattr(u, "bio", "") or "",
+            "profile_pic": u.profile_pic.url if getattr(u, "profile_pic", None) else "",
+        },
+        PROFILE_CACHE_TIMEOUT,
+    ))
     
 @require_POST
 @login_required
@@ -452,17 +728,21 @@ def profile_me(request):
 def profile_update(request):
     u = request.user
 
+    errors = upload_errors(request)
+    if errors:
+        return ORJSONResponse({"error": " ".join(errors.values())}, status=413)
+
     if "phone" in request.POST: u.phone = request.POST.get("phone", "")
     if "hobbies" in request.POST: u.hobbies = request.POST.get("hobbies", "")
     if "bio" in request.POST: u.bio = request.POST.get("bio", "")
 
-    if "profile_pic" in request.FILES:
-        u.profile_pic = request.FILES["profile_pic"]
+    pic_digest = assign_media(request, "profile_pic", u, "profile_pic")
 
     u.save()
+    remember_media(u, "profile_pic", pic_digest)
     u.refresh_from_db()
 
-    return JsonResponse({
+    return ORJSONResponse({
         "id": u.id,
         "email": u.email,
         "username": u.username,
@@ -475,18 +755,19 @@ def profile_update(request):
     
 @ensure_csrf_cookie
 def csrf(request):
-    return JsonResponse({"ok": True})
+    return ORJSONResponse({"ok": True})
 
 @require_POST
 @login_required
 def profile_delete_pic(request):
     u = request.user
     if u.profile_pic:
-        u.profile_pic.delete(save=False)
+        # The stored file is queued for deletion by the pre_save hook
+        # (OTT/media_gc.py); it may be shared with a deduplicated upload.
         u.profile_pic = None
         u.save()
 
-    return JsonResponse({
+    return ORJSONResponse({
         "id": u.id,
         "email": u.email,
         "username": u.username,
@@ -2,5 +2,5 @@
 set -o errexit
 
 pip install -r requirements.txt
-python manage.py collectstatic --noinput
+python manage.py build_static
 python manage.py migrate
@@ -0,0 +1,92 @@
+"""
+Database configuration for django_back.
+
+``DATABASE_URL`` picks the backend (Postgres / MySQL / SQLite, parsed by
+dj-database-url). Without it we keep using the local ``db.sqlite3`` file.
+
+Every connection is persistent (``CONN_MAX_AGE``) and health-checked before
+reuse. SQLite connections additionally get the pragmas from
+``SQLITE_PRAGMAS`` applied when they are opened, see ``apply_sqlite_pragmas``.
+"""
+import os
+
+import dj_database_url
+
+
+def env_int(name, default):
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def sqlite_pragmas():
+    """
+    Pragmas applied to every SQLite connection.
+
+    - WAL lets readers keep reading while a writer commits.
+    - synchronous=NORMAL is durable under WAL and skips an fsync per commit.
+    - busy_timeout makes a writer wait for the lock instead of failing.
+    - mmap_size serves reads straight from the page cache.
+    """
+    return {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "mmap_size": env_int("SQLITE_MMAP_SIZE", 128 * 1024 * 1024),
+        "temp_store": "MEMORY",
+    }
+
+
+def database_config(env="DATABASE_URL", default=None):
+    """
+    Build one ``DATABASES`` entry from an env var holding a database URL.
+    """
+    return _tune(dj_database_url.config(env=env, default=default, **_connection_kwargs()))
+
+
+def replica_configs(env="DATABASE_REPLICA_URLS"):
+    """
+    Read replicas as ``{"replica1": {...}, "replica2": {...}}`` from a
+    comma separated list of database URLs.
+
+    Replicas mirror ``default`` in tests, so the test runner does not
+    create separate (empty) databases for them.
+    """
+    urls = [u.strip() for u in os.getenv(env, "").split(",") if u.strip()]
+    configs = {}
+    for i, url in enumerate(urls, start=1):
+        config = _tune(dj_database_url.parse(url, **_connection_kwargs()))
+        config["TEST"] = {"MIRROR": "default"}
+        configs[f"replica{i}"] = config
+    return configs
+
+
+def _connection_kwargs():
+    return {
+        "conn_max_age": env_int("DB_CONN_MAX_AGE", 600),
+        "conn_health_checks": True,
+    }
+
+
+def _tune(config):
+    if config["ENGINE"] == "django.db.backends.sqlite3":
+        # sqlite3.connect() timeout (seconds) is the python-side busy wait,
+        # keep it in line with the busy_timeout pragma.
+        config.setdefault("OPTIONS", {})
+        config["OPTIONS"].setdefault("timeout", env_int("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000)
+    return config
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver: tune SQLite connections as they open.
+    Connected from ``OttConfig.ready``.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    from django.conf import settings
+
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None) or sqlite_pragmas()
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
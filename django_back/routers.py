@@ -0,0 +1,80 @@
+"""
+Primary / replica database routing.
+
+Reads of OTT models (catalog, users, activity) are spread over the aliases in
+``settings.DATABASE_REPLICAS``; every write goes to ``default``.
+
+To read your own writes, a request that writes is pinned to the primary for
+the rest of the request (the scope ``reset_pinning`` opens), and ``PrimaryPinningMiddleware`` keeps the client
+pinned for ``DATABASE_REPLICA_PIN_SECONDS`` afterwards (longer than the
+expected replica lag).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = "default"
+
+# None: no request scope open (management commands, background threads,
+# on_commit work outside requests). Nothing is pinned or recorded there, so
+# a write can't leave the rest of the process stuck on the primary.
+_pinned = ContextVar("db_pinned_to_primary", default=None)
+_wrote = ContextVar("db_wrote_to_primary", default=None)
+
+
+def pin_to_primary():
+    if _pinned.get() is not None:
+        _pinned.set(True)
+
+
+def is_pinned():
+    return bool(_pinned.get())
+
+
+def wrote_to_primary():
+    return bool(_wrote.get())
+
+
+def reset_pinning(pinned=False):
+    """
+    Start a fresh request scope. Returns tokens for ``restore_pinning``.
+    """
+    return _pinned.set(pinned), _wrote.set(False)
+
+
+def restore_pinning(tokens):
+    pinned_token, wrote_token = tokens
+    _pinned.reset(pinned_token)
+    _wrote.reset(wrote_token)
+
+
+class PrimaryReplicaRouter:
+    route_app_labels = {"OTT"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas or is_pinned():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in self.route_app_labels and _wrote.get() is not None:
+            _wrote.set(True)
+            # Anything read after this in the same request must see the write.
+            pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *getattr(settings, "DATABASE_REPLICAS", [])}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication, never migrate them.
+        if db in getattr(settings, "DATABASE_REPLICAS", []):
+            return False
+        return None
@@ -2,6 +2,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from django_back.database import database_config, replica_configs, sqlite_pragmas
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,15 +42,20 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "OTT.middleware.StaticFilesMiddleware",
+    "OTT.middleware.CompressionMiddleware",
+    "OTT.middleware.PrimaryPinningMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
 
+    # Before CSRF, which reads the body (OTT/uploads.py).
+    "OTT.middleware.RequestSizeLimitMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "OTT.middleware.RateLimitMiddleware",
 ]
 
 ROOT_URLCONF = "django_back.urls"
@@ -75,14 +82,108 @@ TEMPLATES = [
 WSGI_APPLICATION = "django_back.wsgi.application"
 
 # =========================
-# Database (SQLite for now)
+# Database
 # =========================
+# DATABASE_URL (postgres://..., sqlite:///...) overrides the local SQLite file.
+# Connections are persistent + health-checked; SQLite gets WAL pragmas
+# (see django_back/database.py).
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+    "default": database_config(default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+}
+
+SQLITE_PRAGMAS = sqlite_pragmas()
+
+# Read replicas: DATABASE_REPLICA_URLS="postgres://replica-a/...,postgres://replica-b/..."
+# (locally: "sqlite:///replica.sqlite3", refreshed with `manage.py sync_replica`).
+DATABASES.update(replica_configs())
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["django_back.routers.PrimaryReplicaRouter"]
+
+# After a write, keep that client on the primary for this long (> replica lag).
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "5"))
+
+# =========================
+# API responses
+# =========================
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "OTT.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# CompressionMiddleware: smaller bodies aren't worth the CPU / extra headers.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# 4-5 is the usual sweet spot for on-the-fly Brotli (11 is for static builds).
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+# /api/batch/ (OTT/batch.py): sub-requests allowed per batch.
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10"))
+
+# =========================
+# Cache (OTT/cache.py)
+# =========================
+# "default" is a small per-worker LRU in front of "shared". Shared is Redis
+# (or any server speaking its protocol) when CACHE_URL=redis://... is set,
+# otherwise a file-based cache every worker on the host can see.
+CACHE_URL = os.getenv("CACHE_URL", "")
+if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+    SHARED_CACHE = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+else:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / ".cache")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "10000"))},
     }
+
+CACHES = {
+    "default": {
+        "BACKEND": "OTT.cache.TieredCache",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "SHARED": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1000")),
+            # Upper bound on how long a worker can miss another worker's write.
+            "LOCAL_TIMEOUT": int(os.getenv("CACHE_LOCAL_TIMEOUT", "5")),
+        },
+    },
+    "shared": SHARED_CACHE,
+}
+
+# =========================
+# Rate limiting (OTT/ratelimit.py)
+# =========================
+# Token buckets per URL name, by client "ip" and/or signed-in "user".
+# "N/period" = bursts of N, refilled at N per period (s, m, h).
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMITS = {
+    "api_login": {"ip": "10/m"},
+    "api_register": {"ip": "5/m"},
+    "api_movie_list": {"ip": "120/m", "user": "120/m"},
+    "users_status_api": {"user": "30/m"},
 }
+# Buckets live in a memory-mapped table shared by all workers on the host.
+RATE_LIMIT_TABLE = os.getenv("RATE_LIMIT_TABLE", "")  # default: /dev/shm/ott-ratelimit-v1-<uid>
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", "65536"))
+# Reverse proxies in front of the app: the client address is taken that many
+# entries from the right of X-Forwarded-For. 0 = clients connect directly;
+# set 1 on Render, where every client would otherwise share the load
+# balancer's REMOTE_ADDR (see .env.example).
+RATE_LIMIT_PROXY_COUNT = int(os.getenv("RATE_LIMIT_PROXY_COUNT", "0"))
+
+# =========================
+# Playback progress (OTT/progress.py)
+# =========================
+# Heartbeats are coalesced in memory and upserted in one batch this often.
+PROGRESS_FLUSH_SECONDS = int(os.getenv("PROGRESS_FLUSH_SECONDS", "10"))
+PROGRESS_MAX_PENDING = int(os.getenv("PROGRESS_MAX_PENDING", "5000"))
+
+# =========================
+# Data exports (OTT/exports.py)
+# =========================
+# Streaming /exports/ responses outlive GUNICORN_TIMEOUT on the sync preset
+# (gunicorn.conf.py), which would kill them midway: set false when running
+# it and use `manage.py export_data` instead.
+EXPORTS_OVER_HTTP = os.getenv("EXPORTS_OVER_HTTP", "true").lower() == "true"
 
 # =========================
 # Auth
@@ -111,9 +212,14 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
 # ✅ only production uses manifest storage
+# `manage.py build_static` fingerprints every file and writes gzip + Brotli
+# siblings; StaticFilesMiddleware serves them as immutable for one year.
 if not DEBUG:
     STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Un-hashed paths (e.g. /static/style.css) are short-lived.
+WHITENOISE_MAX_AGE = 0 if DEBUG else 300
+
 # =========================
 # Media (Cloudinary)
 # =========================
@@ -129,6 +235,37 @@ DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 # Optional: still keep MEDIA_URL for local references (not used by Cloudinary)
 MEDIA_URL = "/media/"
 
+# Uploads (OTT/uploads.py): hashed while they stream in, size-checked per
+# chunk, deduplicated by digest. Limits are per form field, in bytes.
+FILE_UPLOAD_HANDLERS = [
+    "OTT.uploads.HashingUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+UPLOAD_MAX_SIZES = {
+    "default": 10 * 1024 * 1024,
+    "movie_video": int(os.getenv("UPLOAD_MAX_VIDEO_SIZE", str(2 * 1024 ** 3))),
+    "video_url": int(os.getenv("UPLOAD_MAX_VIDEO_SIZE", str(2 * 1024 ** 3))),
+    "profile_pic": 5 * 1024 * 1024,
+}
+# Whole request body; anything bigger gets a 413 without being read
+# (OTT.middleware.RequestSizeLimitMiddleware).
+UPLOAD_MAX_REQUEST_SIZE = max(UPLOAD_MAX_SIZES.values()) + 20 * 1024 * 1024
+# Replaced/deleted media is queued and removed by `manage.py gc_media`
+# (OTT/media_gc.py) once it has been unreferenced this long.
+MEDIA_GC_GRACE_SECONDS = int(os.getenv("MEDIA_GC_GRACE_SECONDS", "3600"))
+
+# Signed playback URLs (OTT/signing.py): the API hands out /api/play/<id>/
+# links that expire after PLAYBACK_URL_TTL..2*PLAYBACK_URL_TTL seconds.
+PLAYBACK_SIGNING_KEY = os.getenv("PLAYBACK_SIGNING_KEY", SECRET_KEY)
+PLAYBACK_URL_TTL = int(os.getenv("PLAYBACK_URL_TTL", "3600"))
+# OTT.signing.LocalFileBackend serves PLAYBACK_LOCAL_ROOT instead (dev/tests).
+PLAYBACK_BACKEND = os.getenv("PLAYBACK_BACKEND", "OTT.signing.CloudinaryRedirectBackend")
+# Cloudinary token-based access key (hex): delivery URLs then expire with the
+# playback link. Without it they are signed but permanent.
+PLAYBACK_CLOUDINARY_TOKEN_KEY = os.getenv("CLOUDINARY_AUTH_TOKEN_KEY", "")
+PLAYBACK_LOCAL_ROOT = BASE_DIR / "media" / "videos"
+
 # =========================
 # Default PK
 # =========================
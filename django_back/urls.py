@@ -15,6 +15,9 @@ urlpatterns = [
     # ======================================
     path('admin/', admin.site.urls),
 
+    # Liveness probe (load balancer / gunicorn)
+    path('healthz', views.healthz, name='healthz'),
+
 
     # ======================================
     # 🌍 TEMPLATE ROUTES (Django rendered)
@@ -32,6 +35,7 @@ urlpatterns = [
     # Admin management pages
     path('dashboard/', views.dashboard, name='dashboard'),
     path('movies/', views.movie_list, name='movie_list'),
+    path("exports/<slug:name>/", views.export_data, name="export_data"),
     path('movies/create/', views.create_movie, name='create_movie'),
     path('movies/edit/<int:movie_id>/', views.edit_movie, name='edit_movie'),
     path('movies/delete/<int:movie_id>/', views.delete_movie, name='delete_movie'),
@@ -47,8 +51,15 @@ urlpatterns = [
     path('api/logout/', views.LogoutAPIView.as_view(), name='api_logout'),
     path("api/change-password/", views.ChangePasswordAPIView.as_view(), name="api_change_password"),
     path('api/movies/', views.MovieListAPIView.as_view(), name='api_movie_list'),
+    path("api/movies/suggest/", views.movie_suggest_api, name="api_movie_suggest"),
     path('api/movies/<int:movie_id>/', views.MovieDetailAPIView.as_view(), name='api_movie_detail'),
     path("api/home-movies/", views.home_movies_api, name="home_movies_api"),
+    path("api/batch/", views.batch_api, name="api_batch"),
+    path("api/home-feed/", views.HomeFeedAPIView.as_view(), name="api_home_feed"),
+    path("api/play/<int:movie_id>/", views.play_video, name="play_video"),
+    path("api/progress/", views.ProgressAPIView.as_view(), name="api_progress"),
+    path("api/progress/<int:movie_id>/", views.ProgressDetailAPIView.as_view(), name="api_progress_detail"),
+    path("api/continue-watching/", views.ContinueWatchingAPIView.as_view(), name="api_continue_watching"),
     path("api/users-status/", views.users_status_api, name="users_status_api"),
     # path('api/me/', views.MeAPIView.as_view(), name='api_me'),
     path("api/me/", views.profile_me, name="profile_me"),
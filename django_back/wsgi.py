@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_back.settings')
 
 application = get_wsgi_application()
+
+# Pay the lazy-loading costs (URLs, templates, serializers, storage SDKs) now,
+# not on each worker's first request. With gunicorn preload_app this runs once
+# in the master before fork. DJANGO_WARMUP=false skips it.
+if os.getenv("DJANGO_WARMUP", "true").lower() == "true":
+    from django_back.warmup import warm_up
+
+    warm_up()
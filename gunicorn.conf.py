@@ -0,0 +1,152 @@
+"""
+Gunicorn configuration for django_back.
+
+    gunicorn --config gunicorn.conf.py
+
+Pick a preset with GUNICORN_PRESET:
+
+    gthread  fewer processes with GUNICORN_THREADS threads each; good when
+             views mostly wait on the database / Cloudinary (default)
+    sync     one request per process; 2*CPU+1 workers
+    uvicorn  ASGI workers serving django_back.asgi (needs `pip install uvicorn`)
+
+GUNICORN_TIMEOUT means different things per preset. A sync worker is
+killed when one request runs longer than that, so it also cuts off long
+streaming responses such as /exports/ (OTT/exports.py): run it with
+EXPORTS_OVER_HTTP=false (startup logs a warning otherwise). gthread
+and uvicorn workers heartbeat from their main loop while requests run, so
+there the timeout only catches a worker that is stuck as a whole.
+
+Worker counts derive from the CPUs and memory actually available to the
+container (cgroup limits) and can be pinned with GUNICORN_WORKERS /
+GUNICORN_THREADS. Bump CONFIG_VERSION when changing defaults; it is
+logged at startup so deploy logs show which tuning a release ran with.
+"""
+import importlib.util
+import logging
+import multiprocessing
+import os
+
+CONFIG_VERSION = "2"
+
+PRESET = os.getenv("GUNICORN_PRESET", "gthread").lower()
+if PRESET not in ("sync", "gthread", "uvicorn"):
+    raise RuntimeError(f"Unknown GUNICORN_PRESET={PRESET!r} (sync, gthread, uvicorn)")
+
+
+def _env_int(name, default):
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+# =========================
+# Capacity
+# =========================
+def cpu_count():
+    """CPUs this process may use: cgroup v2 quota > affinity > host count."""
+    try:
+        quota, period = open("/sys/fs/cgroup/cpu.max").read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def memory_limit_mb():
+    """Memory available to the container (cgroup v2 / v1), else host RAM."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            value = open(path).read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value) // (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+CPUS = cpu_count()
+MEMORY_MB = memory_limit_mb()
+# Resident size of one worker after warm-up, plus headroom for max_requests drift.
+WORKER_MEMORY_MB = _env_int("GUNICORN_WORKER_MEMORY_MB", 200)
+
+if PRESET == "sync":
+    by_cpu, default_threads = 2 * CPUS + 1, 1
+elif PRESET == "gthread":
+    by_cpu, default_threads = CPUS + 1, 4
+else:
+    by_cpu, default_threads = CPUS, 1
+
+by_memory = max(1, int(MEMORY_MB * 0.8) // WORKER_MEMORY_MB) if MEMORY_MB else by_cpu
+
+workers = _env_int("GUNICORN_WORKERS", max(1, min(by_cpu, by_memory)))
+threads = _env_int("GUNICORN_THREADS", default_threads)
+
+if PRESET == "sync":
+    worker_class = "sync"
+elif PRESET == "gthread":
+    worker_class = "gthread"
+else:
+    if importlib.util.find_spec("uvicorn") is None:
+        raise RuntimeError("GUNICORN_PRESET=uvicorn needs the uvicorn package installed")
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+wsgi_app = "django_back.asgi:application" if PRESET == "uvicorn" else "django_back.wsgi:application"
+
+# =========================
+# Socket
+# =========================
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+backlog = _env_int("GUNICORN_BACKLOG", 2048)
+# Idle keep-alive behind the platform load balancer; sync workers ignore it.
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# =========================
+# Lifecycle
+# =========================
+# Recycle workers to bound memory growth; jitter keeps them from all
+# restarting at the same moment.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# Import + warm up (django_back/warmup.py) once in the master, share it
+# copy-on-write with the workers.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Worker heartbeat files on tmpfs: a slow disk can't stall workers into timeouts.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# =========================
+# Logging
+# =========================
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+class _SkipHealthz(logging.Filter):
+    """Load balancer probes hit /healthz every second; keep them out of the access log."""
+
+    def filter(self, record):
+        args = record.args
+        return not (isinstance(args, dict) and args.get("U") == "/healthz")
+
+
+def on_starting(server):
+    logging.getLogger("gunicorn.access").addFilter(_SkipHealthz())
+    server.log.info(
+        "gunicorn.conf.py v%s: preset=%s workers=%s threads=%s (cpus=%s, memory=%sMB) "
+        "max_requests=%s+%s preload=%s",
+        CONFIG_VERSION, PRESET, workers, threads, CPUS, MEMORY_MB,
+        max_requests, max_requests_jitter, preload_app,
+    )
+    if PRESET == "sync" and os.getenv("EXPORTS_OVER_HTTP", "true").lower() == "true":
+        server.log.warning("sync preset with EXPORTS_OVER_HTTP on: GUNICORN_TIMEOUT will cut long /exports/ short")